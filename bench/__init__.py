@@ -0,0 +1,3 @@
+from .synthetic import SYNTHETIC_MARKER as SYNTHETIC_MARKER
+from .synthetic import SyntheticCatalog as SyntheticCatalog
+from .synthetic import blocklist_from_config as blocklist_from_config
@@ -0,0 +1,204 @@
+import json
+import random
+import yaml
+
+from dataclasses import dataclass, field
+from typing import Iterator
+
+ADJECTIVES = [
+    "Crimson",
+    "Silent",
+    "Pixel",
+    "Iron",
+    "Lucky",
+    "Golden",
+    "Broken",
+    "Hidden",
+    "Electric",
+    "Frozen",
+    "Lost",
+    "Wild",
+    "Tiny",
+    "Cosmic",
+    "Dark",
+    "Happy",
+    "Ancient",
+    "Neon",
+    "Rusty",
+    "Brave",
+    "Quantum",
+    "Velvet",
+    "Savage",
+    "Hollow",
+]
+NOUNS = [
+    "Fox",
+    "Forge",
+    "Owl",
+    "Tower",
+    "Harbor",
+    "Moon",
+    "Anvil",
+    "Lantern",
+    "Wolf",
+    "Garden",
+    "Rocket",
+    "Crow",
+    "Engine",
+    "River",
+    "Dragon",
+    "Pine",
+    "Shell",
+    "Comet",
+    "Bear",
+    "Cactus",
+    "Mountain",
+    "Phoenix",
+    "Storm",
+    "Badger",
+]
+SUFFIXES = [
+    "Studios",
+    "Games",
+    "Interactive",
+    "Entertainment",
+    "Software",
+    "Labs",
+    "Works",
+    "",
+]
+WORDS = (
+    "adventure explore build survive craft fight puzzle story world friends "
+    "quest magic sword city race zombie space pixel retro dungeon hero "
+    "simulator battle island farm horror mystery strategy defend tower"
+).split()
+# Roughly the appdetails type mix of the real catalog
+TYPES = [("game", 70), ("dlc", 20), ("demo", 5), ("music", 3), ("video", 2)]
+# steam_metadata key marking databases generated from a SyntheticCatalog
+SYNTHETIC_MARKER = "synthetic_catalog"
+
+
+@dataclass
+class SyntheticCatalog:
+    # Generates a GetAppList-like app list and appdetails-shaped payloads,
+    # deterministic for a given seed
+    app_count: int = 200000
+    seed: int = 1
+    # Real names sprinkled in, so the filters of a ruleset match something
+    blocklist: list[str] = field(default_factory=list)
+    # Share of apps whose appdetails come back with success = false
+    unavailable_ratio: float = 0.08
+
+    def __post_init__(self):
+        rng = random.Random(self.seed)
+        # A long tail of small studios and a few prolific ones
+        company_count = max(10, self.app_count // 3)
+        self.companies = [
+            " ".join(
+                word
+                for word in (
+                    rng.choice(ADJECTIVES),
+                    rng.choice(NOUNS),
+                    rng.choice(SUFFIXES),
+                )
+                if word
+            )
+            + f" {i}"
+            for i in range(company_count)
+        ]
+        self.company_weights = [1 / (rank + 1) ** 1.1 for rank in range(company_count)]
+        self.appids = sorted(rng.sample(range(10, self.app_count * 15), self.app_count))
+
+    def apps(self) -> Iterator[dict]:
+        rng = random.Random(self.seed + 1)
+        for appid in self.appids:
+            yield {"appid": appid, "name": self.title(rng)}
+
+    def app_list_json(self) -> bytes:
+        return json.dumps({"applist": {"apps": list(self.apps())}}).encode()
+
+    def title(self, rng: random.Random) -> str:
+        return " ".join(
+            rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4))
+        )
+
+    def company(self, rng: random.Random) -> str:
+        if len(self.blocklist) > 0 and rng.random() < 0.01:
+            return rng.choice(self.blocklist)
+        return rng.choices(self.companies, weights=self.company_weights)[0]
+
+    def details(self, appid: int, name: str) -> str:
+        rng = random.Random(self.seed * 1000003 + appid)
+        if rng.random() < self.unavailable_ratio:
+            return json.dumps({"success": False})
+
+        developers = [
+            self.company(rng) for _ in range(rng.choices([0, 1, 2], [5, 85, 10])[0])
+        ]
+        if rng.random() < 0.6 and len(developers) > 0:
+            publishers = [developers[0]]
+        else:
+            publishers = [self.company(rng) if rng.random() < 0.9 else ""]
+
+        app_type = rng.choices([t for t, _ in TYPES], [w for _, w in TYPES])[0]
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(50, 400)))
+        data = {
+            "type": app_type,
+            "name": name,
+            "steam_appid": appid,
+            "required_age": rng.choice([0, 0, 0, 12, 16, 18]),
+            "is_free": rng.random() < 0.15,
+            "detailed_description": description,
+            "about_the_game": description,
+            "short_description": description[:300],
+            "supported_languages": "English, French, German",
+            "header_image": f"https://cdn.example/steam/apps/{appid}/header.jpg",
+            "website": rng.choice([None, "", f"https://game{appid}.example"]),
+            "pc_requirements": {"minimum": "<strong>Minimum:</strong> " + "x" * 400},
+            "developers": developers,
+            "publishers": publishers,
+            "platforms": {
+                "windows": True,
+                "mac": rng.random() < 0.2,
+                "linux": rng.random() < 0.15,
+            },
+            "categories": [{"id": 2, "description": "Single-player"}],
+            "genres": [{"id": "1", "description": "Action"}],
+            "screenshots": [
+                {
+                    "id": i,
+                    "path_thumbnail": f"https://cdn.example/steam/apps/{appid}/ss_{i}.600x338.jpg",
+                    "path_full": f"https://cdn.example/steam/apps/{appid}/ss_{i}.1920x1080.jpg",
+                }
+                for i in range(rng.randint(0, 12))
+            ],
+            "release_date": {"coming_soon": False, "date": "1 Jan, 2024"},
+            "support_info": {
+                "url": rng.choice(["", f"https://support{appid}.example"]),
+                "email": rng.choice(["", f"support@game{appid}.example"]),
+            },
+        }
+        if data["website"] is None:
+            del data["website"]
+        if not data["is_free"] and rng.random() < 0.8:
+            cents = rng.choice([99, 199, 499, 999, 1999, 5999])
+            data["price_overview"] = {
+                "currency": "EUR",
+                "initial": cents,
+                "final": cents,
+                "discount_percent": 0,
+                "final_formatted": f"{cents / 100:.2f}€",
+            }
+
+        return json.dumps({"success": True, "data": data})
+
+
+def blocklist_from_config(config_path: str) -> list[str]:
+    # Values of `kind: list` filters, so the ruleset matches synthetic apps
+    names = []
+    with open(config_path, "r") as f:
+        y = yaml.safe_load(f)
+        for properties in y.get("filters", {}).values():
+            if properties.get("kind") == "list":
+                names.extend(properties.get("values", []))
+    return sorted(set(names))
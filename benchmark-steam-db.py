@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import time
+import yaml
+
+from datetime import datetime, timezone
+
+from rich.console import Console
+from rich.logging import RichHandler
+
+from bench import SYNTHETIC_MARKER, SyntheticCatalog, blocklist_from_config
+from db import Database, DatabaseWriter
+from fetcher import iter_app_list
+from ignorer import CandidateFinder
+
+
+def remove_database(db_path: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    shutil.rmtree(f"{db_path}.snapshot", ignore_errors=True)
+
+
+class Benchmark:
+    def __init__(self, logger, db_path: str, config_path: str, seed: int):
+        self.logger = logger
+        self.db_path = db_path
+        self.config_path = config_path
+        self.seed = seed
+        self.db = Database(db_path=db_path)
+        self.results = {}
+
+        with open(config_path, "r") as f:
+            self.config = yaml.safe_load(f)
+
+    def timed(self, name: str, func, *args):
+        self.logger.info(f"Running {name}")
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+
+        entry = {"seconds": round(seconds, 6)}
+        if isinstance(result, (list, dict, set, tuple)):
+            entry["rows"] = len(result)
+        elif isinstance(result, int):
+            entry["rows"] = result
+        if "rows" in entry and seconds > 0:
+            entry["rows_per_second"] = round(entry["rows"] / seconds, 1)
+        self.results[name] = entry
+        self.logger.info(f"{name}: {entry}")
+        return result
+
+    def meta(self) -> dict:
+        cursor = self.db.connection.cursor()
+        cursor.execute("select count(*) count from steam_app_details")
+        details_count = next(cursor)["count"]
+
+        return {
+            "db": self.db_path,
+            "apps": self.db.get_app_count(),
+            "details": details_count,
+            "sqlite": sqlite3.sqlite_version,
+            "python": platform.python_version(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def run(self, upserts: int) -> dict:
+        meta = self.meta()
+
+        # Reads first, so they always see the generated catalog as is
+        self.bench_filters()
+        self.bench_queries()
+        self.bench_candidates()
+        self.bench_refresh_list()
+        self.bench_upserts(upserts)
+
+        return {"meta": meta, "results": self.results}
+
+    def bench_refresh_list(self):
+        # Current list with 1% new apps and 1% renames, fed as a stream
+        rng = random.Random(self.seed)
+        cursor = self.db.connection.cursor()
+        cursor.execute("select appid, name from steam_apps order by appid")
+        apps = [{"appid": row["appid"], "name": row["name"]} for row in cursor]
+        last_appid = apps[-1]["appid"] if len(apps) > 0 else 0
+        for app in rng.sample(apps, len(apps) // 100):
+            app["name"] += " Renamed"
+        apps.extend(
+            {"appid": last_appid + i + 1, "name": f"New app {i}"}
+            for i in range(len(apps) // 100)
+        )
+        payload = json.dumps({"applist": {"apps": apps}}).encode()
+        chunks = [payload[i : i + (1 << 16)] for i in range(0, len(payload), 1 << 16)]
+
+        def refresh_list():
+            counts = self.db.refresh_apps(iter_app_list(chunks))
+            self.logger.info(f"App list changes: {counts}")
+            return len(apps)
+
+        self.timed("refresh_list", refresh_list)
+
+    def bench_upserts(self, count: int):
+        # Same shape as the generated catalog, blocklisted names included,
+        # but another seed so the payloads actually change
+        generated = json.loads(self.db.get_metadata(SYNTHETIC_MARKER))
+        catalog = SyntheticCatalog(
+            app_count=generated["apps"],
+            seed=generated["seed"] + self.seed,
+            blocklist=blocklist_from_config(self.config_path),
+        )
+        cursor = self.db.connection.cursor()
+        cursor.execute(
+            "select appid, name from steam_apps order by random() limit ?",
+            (count * 3,),
+        )
+        apps = [(row["appid"], row["name"]) for row in cursor]
+        payloads = [(appid, catalog.details(appid, name)) for appid, name in apps]
+        per_row = payloads[:count]
+        batched = payloads[count : count * 2]
+        background = payloads[count * 2 :]
+
+        def upsert_per_row():
+            for appid, details in per_row:
+                self.db.upsert_app_details(appid, details)
+            return len(per_row)
+
+        def upsert_batched():
+            with self.db.connection:
+                cursor = self.db.connection.cursor()
+                for appid, details in batched:
+                    self.db.write_app_details(cursor, appid, details)
+            return len(batched)
+
+        def upsert_background():
+            writer = DatabaseWriter(self.logger, db_path=self.db_path)
+            for appid, details in background:
+                writer.upsert_app_details(appid, details)
+            writer.close()
+            return len(background)
+
+        self.timed("upsert_app_details", upsert_per_row)
+        self.timed("upsert_app_details_batched", upsert_batched)
+        self.timed("upsert_app_details_writer", upsert_background)
+
+    def bench_filters(self):
+        for key, properties in self.config.get("filters", {}).items():
+            values = properties.get("values", [])
+            if properties.get("kind") == "list":
+                single = self.db.list_apps_array_filter
+                batch = self.db.list_apps_array_filter_batch
+            elif properties.get("kind") == "value":
+                single = self.db.list_apps_value_filter
+                batch = self.db.list_apps_value_filter_batch
+            elif properties.get("kind") == "text":
+                single = None
+                batch = self.db.list_apps_text_filter_batch
+            elif properties.get("kind") == "similar_to":
+                single = None
+                threshold = properties.get("threshold", 0.8)
+
+                def batch(key, values):
+                    return self.db.list_apps_similar_to(values, threshold)
+            else:
+                continue
+
+            if single is not None:
+                self.timed(
+                    f"filter:{key}",
+                    lambda: [row for value in values for row in single(key, value)],
+                )
+            self.timed(f"filter_batch:{key}", batch, key, values)
+
+    def bench_queries(self):
+        for query in self.config.get("queries", []):
+            self.timed(
+                f"query:{query['description']}",
+                self.db.list_apps_for_query,
+                query["query"],
+            )
+
+    def bench_candidates(self):
+        finder = CandidateFinder(self.logger, self.db, db_path=self.db_path)
+        self.timed(
+            "candidates",
+            lambda: finder.get_candidates(self.config_path)[0],
+        )
+
+        finder = CandidateFinder(
+            self.logger, self.db, db_path=self.db_path, snapshot=True
+        )
+        self.timed(
+            "candidates_snapshot_build",
+            lambda: finder.get_candidates(self.config_path)[0],
+        )
+        self.timed(
+            "candidates_snapshot",
+            lambda: finder.get_candidates(self.config_path)[0],
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Times the database hot paths and reports the results as JSON"
+    )
+
+    parser.add_argument(
+        "--db",
+        help="Database generated by generate-synthetic-catalog.py to benchmark, it is copied and left as is",
+        type=str,
+        required=True,
+    )
+
+    parser.add_argument(
+        "--config",
+        help="Ruleset to time the filters and queries of",
+        type=str,
+        default="steam-games-to-ignore.yaml",
+    )
+
+    parser.add_argument(
+        "--upserts",
+        help="Number of details upserts to time for each write path",
+        type=int,
+        default=2000,
+    )
+
+    parser.add_argument(
+        "--seed",
+        help="Random seed for the generated changes",
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--output",
+        help="File to write the JSON report to, stdout by default",
+        type=str,
+        default=None,
+    )
+
+    args = parser.parse_args()
+
+    # The report may go to stdout, keep logs out of it
+    handler = RichHandler(
+        console=Console(stderr=True), show_time=False, show_level=False, show_path=False
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level="INFO", handlers=[handler])
+    logger = logging.getLogger("steam-benchmark")
+
+    # Never run on a real cache
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist, generate it first")
+    if Database(db_path=args.db).get_metadata(SYNTHETIC_MARKER) is None:
+        parser.error(f"{args.db} was not generated by generate-synthetic-catalog.py")
+
+    # The benchmark renames apps and overwrites details, so it runs on a
+    # scratch copy and every run measures the same catalog
+    scratch_path = f"{args.db}.bench"
+    remove_database(scratch_path)
+    source = sqlite3.connect(args.db)
+    scratch = sqlite3.connect(scratch_path)
+    source.backup(scratch)
+    scratch.close()
+    source.close()
+    try:
+        benchmark = Benchmark(logger, scratch_path, args.config, args.seed)
+        report = benchmark.run(args.upserts)
+    finally:
+        remove_database(scratch_path)
+    report["meta"]["db"] = args.db
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
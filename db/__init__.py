@@ -1 +1,17 @@
+import importlib
+
 from .db import Database as Database
+from .writer import DatabaseWriter as DatabaseWriter
+from .leases import LeaseHeartbeat as LeaseHeartbeat
+
+# Loaded on first use as it pulls in numpy
+LAZY_IMPORTS = {
+    "CatalogSnapshot": ".snapshot",
+}
+
+
+def __getattr__(name: str):
+    if name in LAZY_IMPORTS:
+        module = importlib.import_module(LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
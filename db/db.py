@@ -1,20 +1,80 @@
+import hashlib
+import itertools
+import json
 import sqlite3
+import time
 
 from dataclasses import dataclass
+from typing import Iterable
 
 from .ddl import MaintainSchema
+from .projection import compress_details, project_details
+from .similarity import (
+    lsh_buckets,
+    pack_signature,
+    signature,
+    similarity,
+    tokens,
+    unpack_signature,
+)
+
+
+# Array keys under `$.data` that are normalised into their own indexed tables
+ARRAY_INDEX_TABLES = {
+    "developers": "app_developers",
+    "publishers": "app_publishers",
+}
+
+# Keys under `$.data` exposed as indexed generated columns on steam_app_details
+GENERATED_COLUMNS = {
+    "type": "data_type",
+    "name": "data_name",
+    "website": "data_website",
+    "support_info.url": "data_support_url",
+    "support_info.email": "data_support_email",
+    "price_overview.final_formatted": "data_price_final_formatted",
+}
+
+# Keys under `$.data` indexed for full-text search in app_text, a filter on
+# any other key searches all of them
+TEXT_INDEX_COLUMNS = ["name", "short_description", "detailed_description"]
+
+
+# Open end of appid ranges
+MAX_APPID = 2**63 - 1
 
 
 @dataclass
 class Database:
-    def __post_init__(self):
-        self.db_path = "data/steam.db"
+    db_path: str = "data/steam.db"
+    # When set, only these `data` fields are stored, see db.projection.
+    # Defaults to the storage mode the database was converted to, if any.
+    projection: list[str] | None = None
+    # Whether to also keep the compressed full payload when projecting
+    keep_raw: bool = False
 
-        self.connection = sqlite3.connect(self.db_path)
+    def __post_init__(self):
+        # Several processes may share the database, e.g. lease workers
+        self.connection = sqlite3.connect(self.db_path, timeout=60)
         self.connection.row_factory = sqlite3.Row
+        # WAL lets readers proceed while the writer commits, and with it
+        # `normal` sync only risks the last commits on power loss, not on
+        # a process crash.
+        self.connection.execute("pragma journal_mode = wal")
+        self.connection.execute("pragma synchronous = normal")
+        # FTS5 queries of text filter values, see text_query
+        self.text_queries = {}
 
         MaintainSchema(self.connection)
 
+        if self.projection is None:
+            # Keeps later runs from mixing full payloads into a lean database
+            storage_mode = self.get_metadata("storage_mode")
+            if storage_mode is not None:
+                storage_mode = json.loads(storage_mode)
+                self.projection = storage_mode["projection"]
+                self.keep_raw = storage_mode["keep_raw"]
+
     def add_app(self, appid: int, name: str):
         # Used inside a transaction, so no `with`
         cursor = self.connection.cursor()
@@ -24,6 +84,122 @@ class Database:
                 """
         cursor.execute(query, (appid, name))
 
+    def refresh_apps(self, apps: Iterable[dict], chunk_size: int = 10000) -> dict:
+        # Stages the full app list in a temp table, then diffs it against
+        # steam_apps and applies new apps and renames in the same transaction.
+        # Apps that are gone from the list are only counted, their details
+        # and ignored status are kept.
+        with self.connection:
+            cursor = self.connection.cursor()
+            cursor.execute("""create temp table if not exists steam_apps_refresh (
+                           appid integer primary key,
+                           name text not null
+                           )
+                           """)
+            cursor.execute("delete from steam_apps_refresh")
+
+            query = """
+                  insert or replace into steam_apps_refresh(appid, name)
+                  values(?,?)
+                  """
+            for chunk in itertools.batched(
+                ((app["appid"], app["name"]) for app in apps), chunk_size
+            ):
+                cursor.executemany(query, chunk)
+
+            counts = {}
+            query = """
+                  select
+                    (select count(*) from steam_apps_refresh r
+                     where not exists (select 1 from steam_apps sa where sa.appid = r.appid)) new,
+                    (select count(*) from steam_apps_refresh r join steam_apps sa using (appid)
+                     where sa.name <> r.name) renamed,
+                    (select count(*) from steam_apps sa
+                     where not exists (select 1 from steam_apps_refresh r where r.appid = sa.appid)) gone
+                  """
+            cursor.execute(query)
+            row = next(cursor)
+            for col in row.keys():
+                counts[col] = row[col]
+
+            query = """
+                  insert into steam_apps(appid, name)
+                  select appid, name from steam_apps_refresh where true
+                  on conflict(appid) do
+                  update set
+                    name = excluded.name
+                  where name <> excluded.name
+                  """
+            cursor.execute(query)
+            cursor.execute("delete from steam_apps_refresh")
+
+        return counts
+
+    def apply_app_list_delta(self, apps: Iterable[dict], queue_refetch: bool) -> dict:
+        # Applies a page of apps added or modified since the last sync. Apps
+        # whose details were fetched before their last modification are
+        # queued for refetch, see list_apps_to_refresh.
+        with self.connection:
+            cursor = self.connection.cursor()
+            cursor.execute("""create temp table if not exists steam_apps_delta (
+                           appid integer primary key,
+                           name text not null,
+                           last_modified integer not null
+                           )
+                           """)
+            cursor.execute("delete from steam_apps_delta")
+            cursor.executemany(
+                """
+                insert or replace into steam_apps_delta(appid, name, last_modified)
+                values(?,?,?)
+                """,
+                (
+                    (app["appid"], app["name"], app.get("last_modified", 0))
+                    for app in apps
+                ),
+            )
+
+            counts = {}
+            query = """
+                  select
+                    (select count(*) from steam_apps_delta d
+                     where not exists (select 1 from steam_apps sa where sa.appid = d.appid)) new,
+                    (select count(*) from steam_apps_delta d join steam_apps sa using (appid)
+                     where sa.name <> d.name) renamed
+                  """
+            cursor.execute(query)
+            row = next(cursor)
+            for col in row.keys():
+                counts[col] = row[col]
+
+            query = """
+                  insert into steam_apps(appid, name)
+                  select appid, name from steam_apps_delta where true
+                  on conflict(appid) do
+                  update set
+                    name = excluded.name
+                  where name <> excluded.name
+                  """
+            cursor.execute(query)
+
+            counts["queued"] = 0
+            if queue_refetch:
+                query = """
+                      insert into steam_app_refetch(appid, modified_at)
+                      select d.appid, d.last_modified
+                      from steam_apps_delta d join steam_app_details sad using (appid)
+                      where coalesce(sad.fetched_at, 0) < d.last_modified
+                      on conflict(appid) do
+                      update set
+                        modified_at = excluded.modified_at
+                      """
+                cursor.execute(query)
+                counts["queued"] = cursor.rowcount
+
+            cursor.execute("delete from steam_apps_delta")
+
+        return counts
+
     def get_app_count(self) -> int:
         with self.connection:
             cursor = self.connection.cursor()
@@ -54,25 +230,577 @@ class Database:
 
         return entries
 
+    def count_apps_missing_details(
+        self, after_appid: int = -1, until_appid: int = MAX_APPID
+    ) -> int:
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  select count(*) count
+                  from steam_apps sa
+                  where sa.appid > ?
+                  and sa.appid <= ?
+                  and not exists (select 1 from steam_app_details sad where sad.appid = sa.appid)
+                  """
+            cursor.execute(query, (after_appid, until_appid))
+
+            return next(cursor)["count"]
+
+    def iter_apps_missing_details(
+        self,
+        after_appid: int = -1,
+        page_size: int = 1000,
+        until_appid: int = MAX_APPID,
+    ):
+        # Keyset pagination by appid, so only one page is ever in memory and
+        # a run can resume from any appid without recomputing the anti-join.
+        while True:
+            with self.connection:
+                cursor = self.connection.cursor()
+                query = """
+                      select sa.appid appid, sa.name name
+                      from steam_apps sa
+                      where sa.appid > ?
+                      and sa.appid <= ?
+                      and not exists (select 1 from steam_app_details sad where sad.appid = sa.appid)
+                      order by sa.appid
+                      limit ?
+                      """
+                cursor.execute(query, (after_appid, until_appid, page_size))
+                rows = cursor.fetchall()
+
+            if len(rows) == 0:
+                return
+
+            for row in rows:
+                entry = {}
+                for col in row.keys():
+                    entry[col] = row[col]
+                yield entry
+
+            after_appid = rows[-1]["appid"]
+
+    def plan_fetch_leases(self, range_size: int) -> int:
+        # Splits the catalog into contiguous appid ranges of about range_size
+        # apps for lease workers, unless a previous plan is still in progress.
+        # The last range is open ended to cover apps added later.
+        with self.connection:
+            cursor = self.connection.cursor()
+            # Takes the write lock before the check, otherwise two workers
+            # starting together could both see no plan and the second would
+            # wipe ranges the first already claimed
+            cursor.execute("begin immediate")
+            query = """
+                  select count(*) count
+                  from fetch_leases
+                  where completed_at is null
+                  """
+            cursor.execute(query)
+            if next(cursor)["count"] > 0:
+                return 0
+
+            cursor.execute("delete from fetch_leases")
+            query = """
+                  select appid
+                  from (
+                    select appid, row_number() over (order by appid) - 1 rn
+                    from steam_apps
+                  )
+                  where rn % ? = 0 and rn > 0
+                  order by appid
+                  """
+            cursor.execute(query, (range_size,))
+            starts = [0] + [row["appid"] for row in cursor.fetchall()]
+            ends = [start - 1 for start in starts[1:]] + [MAX_APPID]
+
+            query = """
+                  insert into fetch_leases(range_start, range_end)
+                  values(?,?)
+                  """
+            cursor.executemany(query, zip(starts, ends))
+
+        return len(starts)
+
+    def claim_fetch_lease(self, owner: str, lease_seconds: float):
+        # Atomically takes the first range that is neither completed nor
+        # held by a live lease, expired leases of crashed workers included
+        now = time.time()
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  update fetch_leases
+                  set owner = ?, expires_at = ?
+                  where range_start = (
+                    select range_start
+                    from fetch_leases
+                    where completed_at is null
+                    and (owner is null or expires_at < ?)
+                    order by range_start
+                    limit 1
+                  )
+                  returning range_start, range_end
+                  """
+            cursor.execute(query, (owner, now + lease_seconds, now))
+            rows = cursor.fetchall()
+
+        if len(rows) == 0:
+            return None
+        return (rows[0]["range_start"], rows[0]["range_end"])
+
+    def renew_fetch_lease(
+        self, owner: str, range_start: int, lease_seconds: float
+    ) -> bool:
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  update fetch_leases
+                  set expires_at = ?
+                  where range_start = ?
+                  and owner = ?
+                  and completed_at is null
+                  """
+            cursor.execute(query, (time.time() + lease_seconds, range_start, owner))
+
+            return cursor.rowcount > 0
+
+    def complete_fetch_lease(self, owner: str, range_start: int):
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  update fetch_leases
+                  set completed_at = ?, owner = null, expires_at = null
+                  where range_start = ?
+                  and owner = ?
+                  """
+            cursor.execute(query, (time.time(), range_start, owner))
+
+    def release_fetch_lease(self, owner: str, range_start: int):
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  update fetch_leases
+                  set owner = null, expires_at = null
+                  where range_start = ?
+                  and owner = ?
+                  """
+            cursor.execute(query, (range_start, owner))
+
+    def merge_details_from(self, path: str) -> int:
+        # Merges apps and details fetched into another database, keeping
+        # whichever details were fetched last
+        self.connection.execute("attach database ? as other", (path,))
+        try:
+            with self.connection:
+                cursor = self.connection.cursor()
+                cursor.execute("""
+                               insert into steam_apps(appid, name)
+                               select appid, name from other.steam_apps where true
+                               on conflict(appid) do nothing
+                               """)
+
+                cursor.execute("drop table if exists temp.merged_apps")
+                cursor.execute("""
+                               create temp table merged_apps as
+                               select o.appid appid
+                               from other.steam_app_details o
+                                 left join main.steam_app_details sad using (appid)
+                               where sad.appid is null
+                               or coalesce(o.fetched_at, 0) > coalesce(sad.fetched_at, 0)
+                               """)
+
+                cursor.execute("""
+                               insert into main.steam_app_details(appid, details, fetched_at, content_hash)
+                               select o.appid, o.details, o.fetched_at, o.content_hash
+                               from other.steam_app_details o join merged_apps using (appid)
+                               where true
+                               on conflict(appid) do
+                               update set
+                                 details = excluded.details,
+                                 fetched_at = excluded.fetched_at,
+                                 content_hash = excluded.content_hash
+                               """)
+                merged = cursor.rowcount
+
+                for key, table in ARRAY_INDEX_TABLES.items():
+                    cursor.execute(f"""
+                                   delete from main.{table}
+                                   where appid in (select appid from merged_apps)
+                                   """)
+                    cursor.execute(f"""
+                                   insert or ignore into main.{table}(appid, name)
+                                   select sad.appid, je.value
+                                   from merged_apps join main.steam_app_details as sad using (appid),
+                                     json_each(sad.details, '$.data.{key}') as je
+                                   where je.value is not null
+                                   """)
+
+                cursor.execute("""
+                               delete from main.app_text
+                               where rowid in (select appid from merged_apps)
+                               """)
+                cursor.execute("""
+                               insert into main.app_text(rowid, name, short_description, detailed_description)
+                               select sad.appid,
+                                 sad.data_name,
+                                 json_extract(sad.details, '$.data.short_description'),
+                                 json_extract(sad.details, '$.data.detailed_description')
+                               from merged_apps join main.steam_app_details as sad using (appid)
+                               where sad.data_success
+                               """)
+
+                cursor.execute("""
+                               select appid, json(sad.details) details
+                               from merged_apps join main.steam_app_details as sad using (appid)
+                               """)
+                for row in cursor.fetchall():
+                    self.upsert_app_similarity_index(
+                        cursor, row["appid"], json.loads(row["details"])
+                    )
+
+                cursor.execute("""
+                               delete from main.steam_app_fetch_errors
+                               where appid in (select appid from merged_apps)
+                               """)
+                cursor.execute("""
+                               delete from main.steam_app_refetch
+                               where appid in (select appid from merged_apps)
+                               and modified_at <= (
+                                 select sad.fetched_at
+                                 from main.steam_app_details as sad
+                                 where sad.appid = steam_app_refetch.appid
+                               )
+                               """)
+                cursor.execute("drop table temp.merged_apps")
+                self.bump_metadata_version(cursor, "details_version")
+        finally:
+            self.connection.execute("detach database other")
+
+        return merged
+
+    def get_metadata(self, key: str) -> str | None:
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  select value
+                  from steam_metadata
+                  where key = ?
+                  """
+            cursor.execute(query, (key,))
+
+            for row in cursor:
+                return row["value"]
+
+        return None
+
+    def set_metadata(self, key: str, value: str):
+        with self.connection:
+            cursor = self.connection.cursor()
+            self.write_metadata(cursor, key, value)
+
+    def write_metadata(self, cursor: sqlite3.Cursor, key: str, value: str):
+        # Used inside a transaction, so no `with`
+        query = """
+              insert into steam_metadata(key, value)
+              values(?,?)
+              on conflict(key) do
+              update set
+                value = excluded.value
+              """
+        cursor.execute(query, (key, str(value)))
+
+    def bump_metadata_version(self, cursor: sqlite3.Cursor, key: str):
+        # Used inside a transaction, so no `with`
+        query = """
+              insert into steam_metadata(key, value)
+              values(?, '1')
+              on conflict(key) do
+              update set
+                value = value + 1
+              """
+        cursor.execute(query, (key,))
+
+    def list_apps_to_refresh(self, budget: int, stale_before: int):
+        # New apps first, then apps modified since their details were fetched,
+        # then apps that were unavailable or errored, then the oldest details,
+        # until the request budget is spent.
+        queries = [
+            """
+            select sa.appid appid, sa.name name
+            from steam_apps sa
+            where not exists (select 1 from steam_app_details sad where sad.appid = sa.appid)
+            and not exists (select 1 from steam_app_fetch_errors safe where safe.appid = sa.appid)
+            limit ?
+            """,
+            """
+            select sa.appid appid, sa.name name
+            from steam_app_refetch sar join steam_apps sa using (appid)
+            where not exists (select 1 from steam_app_fetch_errors safe where safe.appid = sar.appid)
+            order by sar.modified_at
+            limit ?
+            """,
+            """
+            select appid, name from (
+              select sa.appid appid, sa.name name, safe.failed_at attempted_at
+              from steam_app_fetch_errors safe join steam_apps sa using (appid)
+              union all
+              select sa.appid appid, sa.name name, coalesce(sad.fetched_at, 0) attempted_at
+              from steam_app_details sad join steam_apps sa using (appid)
+              where sad.data_success = 0
+              and not exists (select 1 from steam_app_fetch_errors safe where safe.appid = sad.appid)
+              and not exists (select 1 from steam_app_refetch sar where sar.appid = sad.appid)
+            )
+            order by attempted_at
+            limit ?
+            """,
+            """
+            select sa.appid appid, sa.name name
+            from steam_app_details sad join steam_apps sa using (appid)
+            where sad.data_success = 1
+            and coalesce(sad.fetched_at, 0) < ?
+            and not exists (select 1 from steam_app_fetch_errors safe where safe.appid = sad.appid)
+            and not exists (select 1 from steam_app_refetch sar where sar.appid = sad.appid)
+            order by sad.fetched_at
+            limit ?
+            """,
+        ]
+
+        entries = []
+        with self.connection:
+            cursor = self.connection.cursor()
+            for i, query in enumerate(queries):
+                remaining = budget - len(entries)
+                if remaining <= 0:
+                    break
+                params = (remaining,) if i < 3 else (stale_before, remaining)
+                cursor.execute(query, params)
+
+                for row in cursor:
+                    entry = {}
+                    for col in row.keys():
+                        entry[col] = row[col]
+                    entries.append(entry)
+
+        return entries
+
+    def list_apps_awaiting_details(self, limit: int):
+        # New apps and apps modified since their details were fetched, i.e.
+        # the first tiers of list_apps_to_refresh
+        entries = []
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  select appid, name from (
+                    select sa.appid appid, sa.name name, 0 tier, 0 modified_at
+                    from steam_apps sa
+                    where not exists (select 1 from steam_app_details sad where sad.appid = sa.appid)
+                    and not exists (select 1 from steam_app_fetch_errors safe where safe.appid = sa.appid)
+                    union all
+                    select sa.appid appid, sa.name name, 1 tier, sar.modified_at modified_at
+                    from steam_app_refetch sar join steam_apps sa using (appid)
+                    where not exists (select 1 from steam_app_fetch_errors safe where safe.appid = sar.appid)
+                  )
+                  order by tier, modified_at
+                  limit ?
+                  """
+            cursor.execute(query, (limit,))
+
+            for row in cursor:
+                entries.append(dict(row))
+
+        return entries
+
     def upsert_app_details(self, appid: int, details: any):
         with self.connection:
             cursor = self.connection.cursor()
+            self.write_app_details(cursor, appid, details)
+
+    def write_app_details(self, cursor: sqlite3.Cursor, appid: int, details: any):
+        # Used inside a transaction, so no `with`
+        if self.projection is not None:
+            if self.keep_raw:
+                self.write_app_details_raw(cursor, appid, details)
+            details = json.dumps(project_details(json.loads(details), self.projection))
+
+        fetched_at = int(time.time())
+        content_hash = hashlib.sha256(details.encode()).hexdigest()
+        query = """
+              insert into steam_app_details(appid, details, fetched_at, content_hash)
+              values(?,jsonb(?),?,?)
+              on conflict(appid) do
+              update set
+                details = excluded.details,
+                fetched_at = excluded.fetched_at,
+                content_hash = excluded.content_hash
+              where content_hash is not excluded.content_hash
+              """
+        cursor.execute(query, (appid, details, fetched_at, content_hash))
+        changed = cursor.rowcount > 0
+
+        cursor.execute("delete from steam_app_fetch_errors where appid = ?", (appid,))
+        cursor.execute("delete from steam_app_refetch where appid = ?", (appid,))
+
+        if not changed:
+            # Same content, only record that it is fresh
             query = """
-                  insert into steam_app_details(appid, details)
-                  values(?,jsonb(?))
-                  on conflict(appid) do
-                  update set
-                    details = jsonb(?)
+                  update steam_app_details
+                  set fetched_at = ?
+                  where appid = ?
+                  """
+            cursor.execute(query, (fetched_at, appid))
+            return
+
+        self.upsert_app_array_index(cursor, appid)
+        self.upsert_app_text_index(cursor, appid)
+        self.upsert_app_similarity_index(cursor, appid, json.loads(details))
+        self.bump_metadata_version(cursor, "details_version")
+
+    def write_app_details_raw(self, cursor: sqlite3.Cursor, appid: int, details: str):
+        # Used inside a transaction, so no `with`
+        query = """
+              insert into steam_app_details_raw(appid, raw)
+              values(?,?)
+              on conflict(appid) do
+              update set
+                raw = excluded.raw
+              """
+        cursor.execute(query, (appid, compress_details(details)))
+
+    def convert_to_lean(self, batch_size: int = 1000) -> int:
+        # One-off conversion of full payloads to the configured projection,
+        # in appid order and one transaction per batch so it can be resumed.
+        assert self.projection is not None
+        # Recorded first so that runs after an interrupted conversion also
+        # store lean details
+        storage_mode = {"projection": self.projection, "keep_raw": self.keep_raw}
+        self.set_metadata("storage_mode", json.dumps(storage_mode))
+
+        converted = 0
+        last_appid = -1
+        while True:
+            with self.connection:
+                cursor = self.connection.cursor()
+                query = """
+                      select appid, json(details) details
+                      from steam_app_details
+                      where appid > ?
+                      order by appid
+                      limit ?
+                      """
+                cursor.execute(query, (last_appid, batch_size))
+                rows = cursor.fetchall()
+                if len(rows) == 0:
+                    break
+
+                for row in rows:
+                    appid = row["appid"]
+                    details = row["details"]
+                    if self.keep_raw:
+                        # Don't overwrite raw payloads with already projected
+                        # details if the conversion is re-run
+                        query = """
+                              insert or ignore into steam_app_details_raw(appid, raw)
+                              values(?,?)
+                              """
+                        cursor.execute(query, (appid, compress_details(details)))
+                    projected = json.dumps(
+                        project_details(json.loads(details), self.projection)
+                    )
+                    query = """
+                          update steam_app_details
+                          set details = jsonb(?), content_hash = ?
+                          where appid = ?
+                          """
+                    cursor.execute(
+                        query,
+                        (
+                            projected,
+                            hashlib.sha256(projected.encode()).hexdigest(),
+                            appid,
+                        ),
+                    )
+                    self.upsert_app_similarity_index(
+                        cursor, appid, json.loads(projected)
+                    )
+
+                last_appid = rows[-1]["appid"]
+                converted += len(rows)
+                self.bump_metadata_version(cursor, "details_version")
+
+        self.connection.execute("vacuum")
+
+        return converted
+
+    def write_fetch_error(self, cursor: sqlite3.Cursor, appid: int, error: str):
+        # Used inside a transaction, so no `with`
+        query = """
+              insert into steam_app_fetch_errors(appid, error, failed_at)
+              values(?,?,?)
+              on conflict(appid) do
+              update set
+                error = excluded.error,
+                failed_at = excluded.failed_at
+              """
+        cursor.execute(query, (appid, error, int(time.time())))
+
+    def upsert_app_array_index(self, cursor: sqlite3.Cursor, appid: int):
+        # Used inside a transaction, so no `with`
+        for key, table in ARRAY_INDEX_TABLES.items():
+            cursor.execute(f"delete from {table} where appid = ?", (appid,))
+            query = f"""
+                  insert or ignore into {table}(appid, name)
+                  select sad.appid, je.value
+                  from steam_app_details as sad, json_each(sad.details, '$.data.{key}') as je
+                  where sad.appid = ?
+                  and je.value is not null
                   """
-            cursor.execute(query, (appid, details, details))
+            cursor.execute(query, (appid,))
+
+    def upsert_app_text_index(self, cursor: sqlite3.Cursor, appid: int):
+        # Used inside a transaction, so no `with`
+        cursor.execute("delete from app_text where rowid = ?", (appid,))
+        query = """
+              insert into app_text(rowid, name, short_description, detailed_description)
+              select appid,
+                data_name,
+                json_extract(details, '$.data.short_description'),
+                json_extract(details, '$.data.detailed_description')
+              from steam_app_details
+              where appid = ?
+              and data_success
+              """
+        cursor.execute(query, (appid,))
+
+    def upsert_app_similarity_index(
+        self, cursor: sqlite3.Cursor, appid: int, details: dict
+    ):
+        # Used inside a transaction, so no `with`
+        cursor.execute("delete from app_minhash where appid = ?", (appid,))
+        cursor.execute("delete from app_lsh_buckets where appid = ?", (appid,))
+        if not details.get("success"):
+            return
+
+        sig = signature(tokens(details))
+        if sig is None:
+            return
+        cursor.execute(
+            "insert into app_minhash(appid, signature) values(?,?)",
+            (appid, pack_signature(sig)),
+        )
+        cursor.executemany(
+            "insert into app_lsh_buckets(band, bucket, appid) values(?,?,?)",
+            ((band, bucket, appid) for band, bucket in lsh_buckets(sig)),
+        )
 
     def list_apps_array_filter(self, key: str, value: str):
+        if key in ARRAY_INDEX_TABLES:
+            return self.list_apps_array_index_filter(ARRAY_INDEX_TABLES[key], value)
+
         entries = []
         key_param = f"$.data.{key}"
         with self.connection:
             cursor = self.connection.cursor()
             query = """
-                  select sad.appid appid, json_extract(sad.details, '$.data.name') name, sai.ignored ignored
+                  select sad.appid appid, sad.data_name name, sai.ignored ignored
                   from steam_app_details as sad
                     left join steam_apps_ignored as sai using (appid), json_each(sad.details, ?)
                   where json_each.value = ?
@@ -87,18 +815,45 @@ class Database:
 
         return entries
 
+    def list_apps_array_index_filter(self, table: str, value: str):
+        entries = []
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = f"""
+                  select sad.appid appid, sad.data_name name, sai.ignored ignored
+                  from {table} as idx
+                    join steam_app_details as sad using (appid)
+                    left join steam_apps_ignored as sai using (appid)
+                  where idx.name = ?
+                  """
+            cursor.execute(query, (value,))
+
+            for row in cursor:
+                entry = {}
+                for col in row.keys():
+                    entry[col] = row[col]
+                entries.append(entry)
+
+        return entries
+
+    def value_filter_expression(self, key: str) -> tuple[str, tuple]:
+        if key in GENERATED_COLUMNS:
+            return (f"sad.{GENERATED_COLUMNS[key]}", ())
+
+        return ("json_extract(sad.details, ?)", (f"$.data.{key}",))
+
     def list_apps_value_filter(self, key: str, value: str):
         entries = []
-        key_param = f"$.data.{key}"
+        (expression, params) = self.value_filter_expression(key)
         with self.connection:
             cursor = self.connection.cursor()
-            query = """
-                  select sad.appid appid, json_extract(sad.details, '$.data.name') name, sai.ignored ignored
+            query = f"""
+                  select sad.appid appid, sad.data_name name, sai.ignored ignored
                   from steam_app_details as sad
                     left join steam_apps_ignored as sai using (appid)
-                  where json_extract(details, ?) = ?
+                  where {expression} = ?
                   """
-            cursor.execute(query, (key_param, value))
+            cursor.execute(query, params + (value,))
 
             for row in cursor:
                 entry = {}
@@ -108,6 +863,235 @@ class Database:
 
         return entries
 
+    def load_filter_values(self, cursor: sqlite3.Cursor, values: list):
+        # Used inside a transaction, so no `with`. Queries joining against
+        # filter_values use `cross join` to keep it as the outer loop: without
+        # statistics the planner would rather scan the indexed table.
+        cursor.execute(
+            "create temp table if not exists filter_values (value primary key)"
+        )
+        cursor.execute("delete from filter_values")
+        cursor.executemany(
+            "insert or ignore into filter_values(value) values(?)",
+            ((value,) for value in values),
+        )
+
+    def list_apps_array_filter_batch(self, key: str, values: list):
+        return [dict(row) for row in self.iter_apps_array_filter_batch(key, values)]
+
+    def iter_apps_array_filter_batch(self, key: str, values: list):
+        # Rows are yielded lazily. Values go through the one filter_values
+        # temp table, so consume a batch iterator before starting another.
+        key_param = f"$.data.{key}"
+        with self.connection:
+            cursor = self.connection.cursor()
+            self.load_filter_values(cursor, values)
+            if key in ARRAY_INDEX_TABLES:
+                query = f"""
+                      select sad.appid appid, sad.data_name name, sai.ignored ignored, fv.value matched
+                      from filter_values as fv
+                        cross join {ARRAY_INDEX_TABLES[key]} as idx on (idx.name = fv.value)
+                        join steam_app_details as sad on (sad.appid = idx.appid)
+                        left join steam_apps_ignored as sai on (sai.appid = idx.appid)
+                      """
+                cursor.execute(query)
+            else:
+                query = """
+                      select sad.appid appid, sad.data_name name, sai.ignored ignored, json_each.value matched
+                      from steam_app_details as sad
+                        left join steam_apps_ignored as sai using (appid), json_each(sad.details, ?)
+                      where json_each.value in (select value from filter_values)
+                      """
+                cursor.execute(query, (key_param,))
+
+            yield from cursor
+
+    def list_apps_value_filter_batch(self, key: str, values: list):
+        return [dict(row) for row in self.iter_apps_value_filter_batch(key, values)]
+
+    def iter_apps_value_filter_batch(self, key: str, values: list):
+        # See iter_apps_array_filter_batch
+        (expression, params) = self.value_filter_expression(key)
+        with self.connection:
+            cursor = self.connection.cursor()
+            self.load_filter_values(cursor, values)
+            query = f"""
+                  select sad.appid appid, sad.data_name name, sai.ignored ignored, fv.value matched
+                  from filter_values as fv
+                    cross join steam_app_details as sad on ({expression} = fv.value)
+                    left join steam_apps_ignored as sai on (sai.appid = sad.appid)
+                  """
+            cursor.execute(query, params)
+
+            yield from cursor
+
+    def list_apps_text_filter_batch(self, key: str, values: list):
+        return [dict(row) for row in self.iter_apps_text_filter_batch(key, values)]
+
+    def text_query(self, value: str) -> str:
+        # Filter values are FTS5 queries, e.g. `hentai` or `"simulator 2024"`.
+        # Plain text that isn't valid query syntax, e.g. `Half-Life`, `C++`
+        # or `don't`, is searched as a phrase instead.
+        if value not in self.text_queries:
+            query = "select 1 from app_text where app_text match ? and rowid = -1"
+            try:
+                self.connection.execute(query, (value,)).fetchall()
+                self.text_queries[value] = value
+            except sqlite3.OperationalError:
+                self.text_queries[value] = '"' + value.replace('"', '""') + '"'
+        return self.text_queries[value]
+
+    def iter_apps_text_filter_batch(self, key: str, values: list):
+        # See text_query for the values, and iter_apps_array_filter_batch for
+        # the filter_values caveat
+        match = f"app_text.{key}" if key in TEXT_INDEX_COLUMNS else "app_text"
+        values = [self.text_query(str(value)) for value in values]
+        with self.connection:
+            cursor = self.connection.cursor()
+            self.load_filter_values(cursor, values)
+            query = f"""
+                  select sad.appid appid, sad.data_name name, sai.ignored ignored, fv.value matched
+                  from filter_values as fv
+                    join app_text on ({match} match fv.value)
+                    join steam_app_details as sad on (sad.appid = app_text.rowid)
+                    left join steam_apps_ignored as sai on (sai.appid = sad.appid)
+                  """
+            cursor.execute(query)
+
+            yield from cursor
+
+    def list_apps_similar_to(self, appids: list, threshold: float):
+        return list(self.iter_apps_similar_to(appids, threshold))
+
+    def iter_apps_similar_to(self, appids: list, threshold: float):
+        # LSH buckets shared with each of appids give the candidates, whose
+        # estimated similarity is then checked against the threshold
+        cursor = self.connection.cursor()
+        for seed in appids:
+            cursor.execute("select signature from app_minhash where appid = ?", (seed,))
+            row = cursor.fetchone()
+            if row is None:
+                continue
+            seed_signature = unpack_signature(row["signature"])
+
+            query = """
+                  select sad.appid appid, sad.data_name name, sai.ignored ignored, am.signature signature
+                  from app_lsh_buckets as seed
+                    join app_lsh_buckets as lb on (lb.band = seed.band and lb.bucket = seed.bucket)
+                    join app_minhash as am on (am.appid = lb.appid)
+                    join steam_app_details as sad on (sad.appid = lb.appid)
+                    left join steam_apps_ignored as sai on (sai.appid = lb.appid)
+                  where seed.appid = ?
+                  and lb.appid <> seed.appid
+                  group by lb.appid
+                  """
+            for row in cursor.execute(query, (seed,)).fetchall():
+                score = similarity(seed_signature, unpack_signature(row["signature"]))
+                if score >= threshold:
+                    yield {
+                        "appid": row["appid"],
+                        "name": row["name"],
+                        "ignored": row["ignored"],
+                        "matched": seed,
+                        "similarity": score,
+                    }
+
+    def iter_app_values(self):
+        # appid and GENERATED_COLUMNS values of every app, in appid order
+        columns = ", ".join(GENERATED_COLUMNS.values())
+        cursor = self.connection.cursor()
+        cursor.execute(f"select appid, {columns} from steam_app_details order by appid")
+
+        yield from cursor
+
+    def iter_app_array_index(self, key: str):
+        # (appid, name) pairs of ARRAY_INDEX_TABLES[key], in appid order
+        query = f"""
+              select idx.appid appid, idx.name name
+              from {ARRAY_INDEX_TABLES[key]} as idx
+                join steam_app_details as sad using (appid)
+              order by idx.appid, idx.name
+              """
+        cursor = self.connection.cursor()
+        cursor.execute(query)
+
+        yield from cursor
+
+    def iter_apps_for_matches(self, matches: Iterable[tuple[int, str]]):
+        # Resolves (appid, matched) pairs found outside of SQL, e.g. by
+        # db.snapshot, into the rows filters return
+        with self.connection:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "create temp table if not exists matched_apps (appid, matched)"
+            )
+            cursor.execute("delete from matched_apps")
+            cursor.executemany(
+                "insert into matched_apps(appid, matched) values(?,?)", matches
+            )
+            query = """
+                  select sad.appid appid, sad.data_name name, sai.ignored ignored, ma.matched matched
+                  from matched_apps as ma
+                    join steam_app_details as sad on (sad.appid = ma.appid)
+                    left join steam_apps_ignored as sai on (sai.appid = ma.appid)
+                  """
+            cursor.execute(query)
+
+            yield from cursor
+
+    def app_matches_text(self, appid: int, key: str, value: str) -> bool:
+        # Single app counterpart of iter_apps_text_filter_batch
+        match = f"app_text.{key}" if key in TEXT_INDEX_COLUMNS else "app_text"
+        value = self.text_query(str(value))
+        query = f"""
+              select 1
+              from app_text
+              where rowid = ?
+              and {match} match ?
+              """
+        cursor = self.connection.cursor()
+        cursor.execute(query, (appid, value))
+
+        return cursor.fetchone() is not None
+
+    def get_app_similarity(self, appid: int, other_appid: int) -> float | None:
+        # Estimated similarity of two apps, None unless both have a signature
+        query = """
+              select a.signature a, b.signature b
+              from app_minhash as a, app_minhash as b
+              where a.appid = ?
+              and b.appid = ?
+              """
+        cursor = self.connection.cursor()
+        cursor.execute(query, (appid, other_appid))
+
+        for row in cursor:
+            return similarity(unpack_signature(row["a"]), unpack_signature(row["b"]))
+
+        return None
+
+    def app_matches_query(self, appid: int, query: str) -> bool:
+        # Whether appid is among the rows of a ruleset query, which SQLite
+        # can usually narrow down to that app instead of running in full
+        query = f"""
+              select 1
+              from ({query.strip().rstrip(";")})
+              where appid = ?
+              """
+        cursor = self.connection.cursor()
+        cursor.execute(query, (appid,))
+
+        return cursor.fetchone() is not None
+
+    def is_game_ignored(self, appid: int) -> bool:
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "select 1 from steam_apps_ignored where appid = ? and ignored = 'Y'",
+            (appid,),
+        )
+
+        return cursor.fetchone() is not None
+
     def list_apps_for_query(self, query: str):
         entries = []
         with self.connection:
@@ -122,7 +1106,18 @@ class Database:
 
         return entries
 
+    def iter_apps_for_query(self, query: str):
+        cursor = self.connection.cursor()
+        cursor.execute(query)
+
+        yield from cursor
+
     def upsert_game_ignored(self, appid: int):
+        with self.connection:
+            cursor = self.connection.cursor()
+            self.write_game_ignored(cursor, appid)
+
+    def upsert_games_ignored(self, appids: Iterable[int]):
         with self.connection:
             cursor = self.connection.cursor()
             query = """
@@ -131,5 +1126,59 @@ class Database:
                   on conflict(appid) do
                   update set
                     ignored = 'Y'
+                  where ignored is not 'Y'
                   """
-            cursor.execute(query, (appid,))
+            cursor.executemany(query, ((appid,) for appid in appids))
+            if cursor.rowcount > 0:
+                self.bump_metadata_version(cursor, "ignored_version")
+
+    def write_game_ignored(self, cursor: sqlite3.Cursor, appid: int):
+        # Used inside a transaction, so no `with`
+        query = """
+              insert into steam_apps_ignored(appid, ignored)
+              values(?, 'Y')
+              on conflict(appid) do
+              update set
+                ignored = 'Y'
+              where ignored is not 'Y'
+              """
+        cursor.execute(query, (appid,))
+        if cursor.rowcount > 0:
+            self.bump_metadata_version(cursor, "ignored_version")
+
+    def get_data_version(self) -> str:
+        # Moves whenever details or ignored games change
+        details_version = self.get_metadata("details_version") or "0"
+        ignored_version = self.get_metadata("ignored_version") or "0"
+        return f"{details_version}.{ignored_version}"
+
+    def get_rule_results(self, rule_hash: str, version: str) -> list | None:
+        with self.connection:
+            cursor = self.connection.cursor()
+            query = """
+                  select results
+                  from rule_results
+                  where rule_hash = ?
+                  and version = ?
+                  """
+            cursor.execute(query, (rule_hash, version))
+
+            for row in cursor:
+                return json.loads(row["results"])
+
+        return None
+
+    def set_rule_results(self, rule_hash: str, version: str, results: list):
+        with self.connection:
+            cursor = self.connection.cursor()
+            # Results of other versions can't be used anymore
+            cursor.execute("delete from rule_results where version <> ?", (version,))
+            query = """
+                  insert into rule_results(rule_hash, version, results)
+                  values(?,?,?)
+                  on conflict(rule_hash) do
+                  update set
+                    version = excluded.version,
+                    results = excluded.results
+                  """
+            cursor.execute(query, (rule_hash, version, json.dumps(results)))
@@ -8,11 +8,19 @@ import db.schema_upgrades
 @dataclass()
 class MaintainSchema:
     connection: sqlite3.Connection
-    target_schema_version: int = 0
+    target_schema_version: int = 9
 
     def __post_init__(self):
+        # user_version mirrors steam_metadata's schema_version once the schema
+        # is current, so the common case is a single pragma and no DDL
+        user_version = self.connection.execute("pragma user_version").fetchone()[0]
+        if user_version == self.target_schema_version:
+            self.schema_version = user_version
+            return
+
         self.get_schema_version()
         self.upgrade_schema()
+        self.connection.execute(f"pragma user_version = {self.target_schema_version}")
 
     def upgrade_schema(self):
         assert self.schema_version <= self.target_schema_version
@@ -0,0 +1,48 @@
+import logging
+
+from dataclasses import dataclass
+from threading import Event, Thread
+from typing import Iterable, Iterator
+
+from .db import Database
+
+
+@dataclass
+class LeaseHeartbeat:
+    # Keeps a fetch lease alive from a dedicated thread and connection while
+    # its range is being worked on
+    logger: logging.Logger
+    owner: str
+    range_start: int
+    lease_seconds: float
+    db_path: str = "data/steam.db"
+
+    def __post_init__(self):
+        # Set if the lease could not be renewed, e.g. it expired and another
+        # worker reclaimed the range
+        self.lost = False
+        self.stop_event = Event()
+        self.thread = Thread(target=self.run, name="lease-heartbeat", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        db = Database(db_path=self.db_path)
+        while not self.stop_event.wait(self.lease_seconds / 3):
+            if not db.renew_fetch_lease(
+                self.owner, self.range_start, self.lease_seconds
+            ):
+                self.logger.warning(f"Lost lease on range from {self.range_start}")
+                self.lost = True
+                break
+        db.connection.close()
+
+    def guard(self, apps: Iterable[dict]) -> Iterator[dict]:
+        # Stops handing out apps once the lease is lost
+        for app in apps:
+            if self.lost:
+                return
+            yield app
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
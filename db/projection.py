@@ -0,0 +1,40 @@
+import zlib
+
+# Fields under `data` kept by lean storage. Covers what filters, generated
+# columns and the sample queries use; screenshots, movies, about_the_game
+# (usually a copy of detailed_description), requirements etc. are dropped.
+DEFAULT_PROJECTION = [
+    "type",
+    "name",
+    "steam_appid",
+    "required_age",
+    "is_free",
+    "short_description",
+    "detailed_description",
+    "developers",
+    "publishers",
+    "website",
+    "support_info",
+    "price_overview",
+    "platforms",
+    "categories",
+    "genres",
+    "release_date",
+    "content_descriptors",
+]
+
+
+def project_details(details: dict, fields: list[str]) -> dict:
+    projected = {key: value for key, value in details.items() if key != "data"}
+    if "data" in details:
+        data = details["data"]
+        projected["data"] = {key: data[key] for key in fields if key in data}
+    return projected
+
+
+def compress_details(details: str) -> bytes:
+    return zlib.compress(details.encode(), 9)
+
+
+def decompress_details(blob: bytes) -> str:
+    return zlib.decompress(blob).decode()
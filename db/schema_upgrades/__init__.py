@@ -1 +1,10 @@
 from .v0 import SchemaUpgradeV0 as SchemaUpgradeV0
+from .v1 import SchemaUpgradeV1 as SchemaUpgradeV1
+from .v2 import SchemaUpgradeV2 as SchemaUpgradeV2
+from .v3 import SchemaUpgradeV3 as SchemaUpgradeV3
+from .v4 import SchemaUpgradeV4 as SchemaUpgradeV4
+from .v5 import SchemaUpgradeV5 as SchemaUpgradeV5
+from .v6 import SchemaUpgradeV6 as SchemaUpgradeV6
+from .v7 import SchemaUpgradeV7 as SchemaUpgradeV7
+from .v8 import SchemaUpgradeV8 as SchemaUpgradeV8
+from .v9 import SchemaUpgradeV9 as SchemaUpgradeV9
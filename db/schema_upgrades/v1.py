@@ -0,0 +1,56 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV1(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 1
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_create_table_app_developers()
+        self.ddl_create_table_app_publishers()
+        self.backfill("app_developers", "developers")
+        self.backfill("app_publishers", "publishers")
+
+    def ddl_create_table_app_developers(self):
+        self.connection.execute("""create table if not exists app_developers (
+                                 appid integer not null,
+                                 name text not null,
+                                 primary key (appid, name)
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists app_developers_1 on app_developers (
+                                 name,
+                                 appid
+                                 )
+                              """)
+
+    def ddl_create_table_app_publishers(self):
+        self.connection.execute("""create table if not exists app_publishers (
+                                 appid integer not null,
+                                 name text not null,
+                                 primary key (appid, name)
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists app_publishers_1 on app_publishers (
+                                 name,
+                                 appid
+                                 )
+                              """)
+
+    def backfill(self, table: str, key: str):
+        with self.connection:
+            self.connection.execute(f"""insert or ignore into {table}(appid, name)
+                                     select sad.appid, je.value
+                                     from steam_app_details as sad,
+                                       json_each(sad.details, '$.data.{key}') as je
+                                     where je.value is not null
+                                  """)
@@ -0,0 +1,63 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV2(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 2
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_alter_table_steam_app_details()
+        self.ddl_create_indexes_steam_app_details()
+
+    def ddl_alter_table_steam_app_details(self):
+        # Only virtual generated columns can be added to an existing table.
+        # They are computed on read, but indexes on them are materialised.
+        columns = {
+            "data_type": "$.data.type",
+            "data_name": "$.data.name",
+            "data_website": "$.data.website",
+            "data_support_url": "$.data.support_info.url",
+            "data_support_email": "$.data.support_info.email",
+            "data_price_final_formatted": "$.data.price_overview.final_formatted",
+        }
+        for column, path in columns.items():
+            self.connection.execute(f"""alter table steam_app_details
+                                     add column {column} text
+                                     generated always as (json_extract(details, '{path}')) virtual
+                                  """)
+
+    def ddl_create_indexes_steam_app_details(self):
+        self.connection.execute("""create index if not exists steam_app_details_1 on steam_app_details (
+                                 data_type,
+                                 appid
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists steam_app_details_2 on steam_app_details (
+                                 data_name,
+                                 appid
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists steam_app_details_3 on steam_app_details (
+                                 data_website,
+                                 appid
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists steam_app_details_4 on steam_app_details (
+                                 data_support_url,
+                                 appid
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists steam_app_details_5 on steam_app_details (
+                                 data_support_email,
+                                 appid
+                                 )
+                              """)
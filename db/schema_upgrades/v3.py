@@ -0,0 +1,51 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV3(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 3
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_alter_table_steam_app_details()
+        self.ddl_create_table_steam_app_fetch_errors()
+
+    def ddl_alter_table_steam_app_details(self):
+        # Existing rows keep a null fetched_at, i.e. they are the stalest
+        self.connection.execute("""alter table steam_app_details
+                                 add column fetched_at integer
+                              """)
+        self.connection.execute("""alter table steam_app_details
+                                 add column content_hash text
+                              """)
+        self.connection.execute("""alter table steam_app_details
+                                 add column data_success integer
+                                 generated always as (json_extract(details, '$.success')) virtual
+                              """)
+        self.connection.execute("""create index if not exists steam_app_details_6 on steam_app_details (
+                                 data_success,
+                                 fetched_at,
+                                 appid
+                                 )
+                              """)
+
+    def ddl_create_table_steam_app_fetch_errors(self):
+        self.connection.execute("""create table if not exists steam_app_fetch_errors (
+                                 appid integer primary key,
+                                 error text not null,
+                                 failed_at integer not null
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists steam_app_fetch_errors_1 on steam_app_fetch_errors (
+                                 failed_at,
+                                 appid
+                                 )
+                              """)
@@ -0,0 +1,27 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV4(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 4
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_create_table_steam_app_details_raw()
+
+    def ddl_create_table_steam_app_details_raw(self):
+        # zlib compressed full appdetails payload, only kept on request when
+        # steam_app_details holds a projection
+        self.connection.execute("""create table if not exists steam_app_details_raw (
+                                 appid integer primary key,
+                                 raw blob not null
+                                 )
+                              """)
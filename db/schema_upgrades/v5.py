@@ -0,0 +1,35 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV5(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 5
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_create_table_fetch_leases()
+
+    def ddl_create_table_fetch_leases(self):
+        # Appid ranges that fetch workers claim with an expiring lease
+        self.connection.execute("""create table if not exists fetch_leases (
+                                 range_start integer primary key,
+                                 range_end integer not null,
+                                 owner text,
+                                 expires_at real,
+                                 completed_at real
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists fetch_leases_1 on fetch_leases (
+                                 completed_at,
+                                 expires_at,
+                                 range_start
+                                 )
+                              """)
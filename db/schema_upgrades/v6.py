@@ -0,0 +1,40 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV6(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 6
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_create_table_app_text()
+        self.backfill()
+
+    def ddl_create_table_app_text(self):
+        # Full-text index of names and descriptions, the rowid is the appid
+        self.connection.execute("""create virtual table if not exists app_text using fts5(
+                                 name,
+                                 short_description,
+                                 detailed_description,
+                                 tokenize = 'unicode61 remove_diacritics 2'
+                                 )
+                              """)
+
+    def backfill(self):
+        with self.connection:
+            self.connection.execute("""insert into app_text(rowid, name, short_description, detailed_description)
+                                     select appid,
+                                       data_name,
+                                       json_extract(details, '$.data.short_description'),
+                                       json_extract(details, '$.data.detailed_description')
+                                     from steam_app_details
+                                     where data_success
+                                  """)
@@ -0,0 +1,82 @@
+import json
+import sqlite3
+
+from dataclasses import dataclass
+
+from ..similarity import lsh_buckets, pack_signature, signature, tokens
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV7(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 7
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_create_table_app_minhash()
+        self.ddl_create_table_app_lsh_buckets()
+        self.backfill()
+
+    def ddl_create_table_app_minhash(self):
+        # MinHash signature of description shingles and screenshot hashes,
+        # see db.similarity
+        self.connection.execute("""create table if not exists app_minhash (
+                                 appid integer primary key,
+                                 signature blob not null
+                                 )
+                              """)
+
+    def ddl_create_table_app_lsh_buckets(self):
+        self.connection.execute("""create table if not exists app_lsh_buckets (
+                                 band integer not null,
+                                 bucket integer not null,
+                                 appid integer not null,
+                                 primary key (band, bucket, appid)
+                                 ) without rowid
+                              """)
+        self.connection.execute("""create index if not exists app_lsh_buckets_1 on app_lsh_buckets (
+                                 appid
+                                 )
+                              """)
+
+    def backfill(self, batch_size: int = 1000):
+        # Signatures are computed in Python, in appid order and batches
+        last_appid = -1
+        while True:
+            with self.connection:
+                cursor = self.connection.cursor()
+                cursor.execute(
+                    """select appid, json(details) details
+                       from steam_app_details
+                       where appid > ?
+                       and data_success
+                       order by appid
+                       limit ?
+                    """,
+                    (last_appid, batch_size),
+                )
+                rows = cursor.fetchall()
+                if len(rows) == 0:
+                    break
+
+                for row in rows:
+                    sig = signature(tokens(json.loads(row["details"])))
+                    if sig is None:
+                        continue
+                    cursor.execute(
+                        "insert into app_minhash(appid, signature) values(?,?)",
+                        (row["appid"], pack_signature(sig)),
+                    )
+                    cursor.executemany(
+                        "insert into app_lsh_buckets(band, bucket, appid) values(?,?,?)",
+                        (
+                            (band, bucket, row["appid"])
+                            for band, bucket in lsh_buckets(sig)
+                        ),
+                    )
+
+                last_appid = rows[-1]["appid"]
@@ -0,0 +1,28 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV8(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 8
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_create_table_rule_results()
+
+    def ddl_create_table_rule_results(self):
+        # Cached rows of ignore rules, by hash of the rule and valid for one
+        # data version
+        self.connection.execute("""create table if not exists rule_results (
+                                 rule_hash text primary key,
+                                 version text not null,
+                                 results text not null
+                                 )
+                              """)
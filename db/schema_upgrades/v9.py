@@ -0,0 +1,31 @@
+import sqlite3
+
+from dataclasses import dataclass
+
+from .schema_upgrade import SchemaUpgrade
+
+
+@dataclass()
+class SchemaUpgradeV9(SchemaUpgrade):
+    connection: sqlite3.Connection
+    schema_version: int = 9
+
+    def __post_init__(self):
+        self.upgrade()
+        self.set_version()
+
+    def upgrade(self):
+        self.ddl_create_table_steam_app_refetch()
+
+    def ddl_create_table_steam_app_refetch(self):
+        # Apps the store listed as modified after their details were fetched
+        self.connection.execute("""create table if not exists steam_app_refetch (
+                                 appid integer primary key,
+                                 modified_at integer not null
+                                 )
+                              """)
+        self.connection.execute("""create index if not exists steam_app_refetch_1 on steam_app_refetch (
+                                 modified_at,
+                                 appid
+                                 )
+                              """)
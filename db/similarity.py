@@ -0,0 +1,84 @@
+import hashlib
+import re
+import struct
+
+# MinHash signatures are split into LSH bands of rows. Apps sharing all rows
+# of any band become candidates, i.e. pairs with a Jaccard similarity of
+# about (1 / BANDS) ** (1 / ROWS) ≈ 0.5 and above are usually found.
+SIGNATURE_SIZE = 64
+ROWS = 4
+BANDS = SIGNATURE_SIZE // ROWS
+
+# Words per description shingle
+SHINGLE_SIZE = 3
+
+TAG = re.compile(r"<[^>]*>")
+WORD = re.compile(r"\w+")
+# Screenshot file names are content hashes, e.g. ss_<sha1>.1920x1080.jpg
+ASSET = re.compile(r"/(ss_[0-9a-f]+)[^/]*$")
+
+
+def token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest())
+
+
+def tokens(details: dict) -> set[str]:
+    data = details.get("data", {})
+    result = set()
+    for key in ["short_description", "detailed_description"]:
+        words = WORD.findall(TAG.sub(" ", data.get(key) or "").lower())
+        for i in range(max(len(words) - SHINGLE_SIZE + 1, 0)):
+            result.add("d:" + " ".join(words[i : i + SHINGLE_SIZE]))
+    for screenshot in data.get("screenshots") or []:
+        match = ASSET.search((screenshot.get("path_full") or "").split("?")[0])
+        if match:
+            result.add("a:" + match.group(1))
+    return result
+
+
+def signature(tokens: set[str]) -> list[int] | None:
+    # One permutation hashing: a single hash per token, binned by its low
+    # bits and keeping the minimum of the rest per bin, then empty bins
+    # borrowing from the next non-empty one so sparse sets stay comparable.
+    if len(tokens) == 0:
+        return None
+
+    bins = [None] * SIGNATURE_SIZE
+    for token in tokens:
+        h = token_hash(token)
+        i = h % SIGNATURE_SIZE
+        value = h >> 32
+        if bins[i] is None or value < bins[i]:
+            bins[i] = value
+
+    result = []
+    for i in range(SIGNATURE_SIZE):
+        offset = 0
+        while bins[(i + offset) % SIGNATURE_SIZE] is None:
+            offset += 1
+        result.append((bins[(i + offset) % SIGNATURE_SIZE] + offset) & 0xFFFFFFFF)
+    return result
+
+
+def lsh_buckets(signature: list[int]) -> list[tuple[int, int]]:
+    # (band, bucket) pairs, the bucket being a signed 64 bit hash of the
+    # band's rows so it fits an SQLite integer
+    buckets = []
+    for band in range(BANDS):
+        rows = struct.pack(f"<{ROWS}I", *signature[band * ROWS : (band + 1) * ROWS])
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, signed=True)))
+    return buckets
+
+
+def pack_signature(signature: list[int]) -> bytes:
+    return struct.pack(f"<{SIGNATURE_SIZE}I", *signature)
+
+
+def unpack_signature(blob: bytes) -> tuple[int, ...]:
+    return struct.unpack(f"<{SIGNATURE_SIZE}I", blob)
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    # Estimated Jaccard similarity of the token sets
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_SIZE
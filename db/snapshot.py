@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from dataclasses import dataclass
+
+from .db import ARRAY_INDEX_TABLES, GENERATED_COLUMNS, Database
+
+
+@dataclass
+class CatalogSnapshot:
+    # Columnar copy of the fields `kind: list/value` filters use, saved as
+    # .npy files that are memory-mapped on load. Strings are dictionary
+    # encoded, lists are CSR style: the entries of app i are
+    # ids[offsets[i]:offsets[i + 1]]. Rebuilt whenever details_version moves.
+    db: Database
+    path: str
+
+    def __post_init__(self):
+        version = self.db.get_metadata("details_version") or "0"
+        if not self.load(version):
+            self.load(self.build())
+
+    def supports(self, key: str, kind: str) -> bool:
+        if kind == "list":
+            return key in ARRAY_INDEX_TABLES
+        if kind == "value":
+            return key in GENERATED_COLUMNS
+        return False
+
+    def load(self, version: str) -> bool:
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return False
+        if meta["version"] != version:
+            return False
+
+        self.dictionaries = meta["dictionaries"]
+        self.lookups = {}
+        self.arrays = {}
+        for name in meta["arrays"]:
+            self.arrays[name] = np.load(
+                os.path.join(self.path, f"{name}.npy"), mmap_mode="r"
+            )
+        return True
+
+    def build(self) -> str:
+        # Other processes may be writing details meanwhile. All scans run in
+        # one read transaction so they see the same apps, otherwise entries
+        # of a new app would be attributed to the app before it.
+        self.db.connection.execute("begin")
+        try:
+            (version, arrays, dictionaries) = self.scan()
+        finally:
+            self.db.connection.commit()
+        self.save(version, arrays, dictionaries)
+        return version
+
+    def scan(self) -> tuple[str, dict, dict]:
+        # Not get_metadata, its `with` would end the transaction
+        cursor = self.db.connection.execute(
+            "select value from steam_metadata where key = 'details_version'"
+        )
+        row = cursor.fetchone()
+        version = row["value"] if row is not None else "0"
+        dictionaries = {key: {} for key in GENERATED_COLUMNS}
+        appids = []
+        codes = {key: [] for key in GENERATED_COLUMNS}
+        for row in self.db.iter_app_values():
+            appids.append(row["appid"])
+            for key, column in GENERATED_COLUMNS.items():
+                value = row[column]
+                if value is None:
+                    codes[key].append(-1)
+                else:
+                    codes[key].append(
+                        dictionaries[key].setdefault(value, len(dictionaries[key]))
+                    )
+
+        arrays = {"appids": np.array(appids, dtype=np.int64)}
+        for key in GENERATED_COLUMNS:
+            arrays[f"{key}.codes"] = np.array(codes[key], dtype=np.int32)
+
+        for key in ARRAY_INDEX_TABLES:
+            dictionaries[key] = {}
+            entry_appids = []
+            ids = []
+            for row in self.db.iter_app_array_index(key):
+                entry_appids.append(row["appid"])
+                ids.append(
+                    dictionaries[key].setdefault(row["name"], len(dictionaries[key]))
+                )
+            offsets = np.searchsorted(
+                np.array(entry_appids, dtype=np.int64), arrays["appids"]
+            )
+            arrays[f"{key}.offsets"] = np.append(offsets, len(ids)).astype(np.int64)
+            arrays[f"{key}.ids"] = np.array(ids, dtype=np.int32)
+
+        return (version, arrays, dictionaries)
+
+    def save(self, version: str, arrays: dict, dictionaries: dict):
+        # Written aside and swapped in, so readers never see a partial one
+        tmp_path = f"{self.path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            meta = {
+                "version": version,
+                "dictionaries": {
+                    key: list(values) for key, values in dictionaries.items()
+                },
+                "arrays": list(arrays),
+            }
+            json.dump(meta, f)
+
+        old_path = f"{self.path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def lookup(self, key: str) -> dict:
+        if key not in self.lookups:
+            self.lookups[key] = {
+                value: i for i, value in enumerate(self.dictionaries[key])
+            }
+        return self.lookups[key]
+
+    def evaluate(self, key: str, kind: str, values: list) -> list[tuple[int, str]]:
+        # (appid, matched) pairs, as set-membership masks over the arrays
+        lookup = self.lookup(key)
+        wanted = np.array(
+            [lookup[str(value)] for value in values if str(value) in lookup],
+            dtype=np.int32,
+        )
+        if len(wanted) == 0:
+            return []
+
+        dictionary = self.dictionaries[key]
+        appids = self.arrays["appids"]
+        if kind == "value":
+            codes = self.arrays[f"{key}.codes"]
+            apps = np.flatnonzero(np.isin(codes, wanted))
+            return [(int(appids[app]), dictionary[codes[app]]) for app in apps]
+
+        ids = self.arrays[f"{key}.ids"]
+        positions = np.flatnonzero(np.isin(ids, wanted))
+        # The app owning each matching entry
+        apps = (
+            np.searchsorted(self.arrays[f"{key}.offsets"], positions, side="right") - 1
+        )
+        return [
+            (int(appids[app]), dictionary[ids[position]])
+            for app, position in zip(apps, positions)
+        ]
@@ -0,0 +1,119 @@
+import logging
+import queue
+import sqlite3
+import time
+
+from dataclasses import dataclass
+from threading import Thread
+
+from .db import Database
+
+
+@dataclass
+class DatabaseWriter:
+    # Funnels writes through a dedicated thread and connection, grouping them
+    # into one transaction per batch. Callers never block on disk, and a
+    # crash loses at most the batch being accumulated.
+    logger: logging.Logger
+    # Commit once this many writes are pending…
+    batch_size: int = 500
+    # …or once the oldest pending write is this many seconds old
+    flush_interval: float = 2.0
+    db_path: str = "data/steam.db"
+    # Storage mode, see Database
+    projection: list[str] | None = None
+    keep_raw: bool = False
+    # Anything with observe_db_write(rows, seconds) and set_gauge(name, value)
+    metrics: any = None
+    # Attempts and backoff when a commit fails because the database is busy
+    max_retries: int = 3
+    retry_pause: float = 1.0
+
+    def __post_init__(self):
+        self.queue = queue.Queue()
+        self.thread = Thread(target=self.run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def upsert_app_details(self, appid: int, details: any):
+        self.queue.put(("write_app_details", (appid, details)))
+
+    def record_fetch_error(self, appid: int, error: str):
+        self.queue.put(("write_fetch_error", (appid, error)))
+
+    def upsert_game_ignored(self, appid: int):
+        self.queue.put(("write_game_ignored", (appid,)))
+
+    def set_metadata(self, key: str, value: str):
+        self.queue.put(("write_metadata", (key, value)))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        # sqlite3 connections are bound to the thread that created them
+        db = Database(
+            db_path=self.db_path, projection=self.projection, keep_raw=self.keep_raw
+        )
+        done = False
+        while not done:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+
+            self.flush(db, batch)
+
+        db.connection.close()
+
+    def flush(self, db: Database, batch: list):
+        start = time.monotonic()
+        try:
+            self.commit(db, batch)
+        except Exception:
+            # Commit what we can one write at a time rather than lose the
+            # whole batch, checkpoints included, to one bad write
+            self.logger.exception(
+                f"Failed to commit batch of {len(batch)} writes, retrying one by one"
+            )
+            for item in batch:
+                try:
+                    self.commit(db, [item])
+                except Exception:
+                    self.logger.exception(f"Dropping write {item[0]}{item[1]!r:.100}")
+
+        seconds = time.monotonic() - start
+        if self.metrics is not None:
+            self.metrics.observe_db_write(len(batch), seconds)
+            self.metrics.set_gauge("db_write_queue", self.queue.qsize())
+        self.logger.debug(f"Committed {len(batch)} writes in {seconds:.3f}s")
+
+    def commit(self, db: Database, batch: list):
+        # Retries while other processes hold the database, e.g. lease workers
+        for attempt in range(self.max_retries + 1):
+            try:
+                with db.connection:
+                    cursor = db.connection.cursor()
+                    for op, args in batch:
+                        getattr(db, op)(cursor, *args)
+                return
+            except sqlite3.OperationalError as e:
+                busy = e.sqlite_errorcode in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+                if not busy or attempt == self.max_retries:
+                    raise
+                self.logger.warning("Database busy, retrying commit")
+                time.sleep(self.retry_pause * 2**attempt)
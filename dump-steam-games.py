@@ -3,10 +3,12 @@
 import argparse
 import json
 import logging
-import requests
+import os
 import signal
+import socket
 from threading import Event
 import time
+from typing import Iterable
 
 from rich.console import Console
 from rich.logging import RichHandler
@@ -19,18 +21,45 @@ from rich.progress import (
     TimeRemainingColumn,
 )
 
-from db import Database
+# requests, and whatever of fetcher needs aiohttp, are imported where used
+# so short invocations start fast
+from db import Database, DatabaseWriter, LeaseHeartbeat
+from db.projection import DEFAULT_PROJECTION
+from fetcher import (
+    AppListRefresher,
+    FetchCheckpoint,
+    FetchMetrics,
+    TokenBucketRateLimiter,
+    parse_retry_after,
+)
 
 
 class SteamDumper:
-    def __init__(self, logger, done_event: Event, debug: bool):
-        self.db = Database()
+    def __init__(
+        self,
+        logger,
+        done_event: Event,
+        debug: bool,
+        projection: list[str] | None = None,
+        keep_raw: bool = False,
+        metrics: FetchMetrics | None = None,
+        db_path: str = "data/steam.db",
+    ):
+        self.metrics = metrics if metrics is not None else FetchMetrics()
+        self.db_path = db_path
+        self.db = Database(db_path=db_path, projection=projection, keep_raw=keep_raw)
+        # The database may default to the storage mode it was converted to
+        self.projection = self.db.projection
+        self.keep_raw = self.db.keep_raw
         self.logger = logger
         self.done_event = done_event
         self.debug = debug
 
         # Timeout for HTTP requests
         self.timeout = 20
+        self.app_list = AppListRefresher(
+            self.db, logger, done_event, timeout=self.timeout
+        )
 
         width = Console().width
         self.max_name_width = int(width / 4)
@@ -51,12 +80,54 @@ class SteamDumper:
             TimeRemainingColumn(elapsed_when_finished=True),
         )
 
-    def run(self, refresh_list: bool, fetch_missing_details: bool):
+    def run(
+        self,
+        convert_lean: bool,
+        refresh_list: bool,
+        stream_list: bool,
+        fetch_missing_details: bool,
+        refresh_stale_details: bool,
+        budget: int,
+        stale_days: float,
+        async_fetch: bool,
+        concurrency: int,
+        store_url: str,
+        lease_worker: bool,
+        worker_id: str,
+        lease_seconds: float,
+        range_size: int,
+        merge_from: list[str],
+        delta_list: bool,
+        api_url: str,
+        api_key: str | None,
+    ):
+        if convert_lean:
+            self.convert_lean()
+
+        for path in merge_from:
+            self.merge_from(path)
+
         if refresh_list:
-            self.refresh_list()
+            if delta_list:
+                self.refresh_list_delta(api_url, api_key)
+            elif stream_list:
+                self.refresh_list_streaming()
+            else:
+                self.refresh_list()
 
         if fetch_missing_details:
-            self.fetch_missing_details()
+            if async_fetch:
+                self.fetch_missing_details_async(concurrency, store_url)
+            else:
+                self.fetch_missing_details(store_url)
+
+        if lease_worker:
+            self.fetch_leased_details(
+                concurrency, store_url, worker_id, lease_seconds, range_size
+            )
+
+        if refresh_stale_details:
+            self.refresh_stale_details(budget, stale_days, concurrency, store_url)
 
     # TODO: refactor
     def ellipsise(self, name: str) -> str:
@@ -71,7 +142,18 @@ class SteamDumper:
 
         return left + "…" + right
 
+    def convert_lean(self):
+        self.logger.info("Converting stored details to the lean projection")
+        converted = self.db.convert_to_lean()
+        self.logger.info(f"Converted {converted} apps")
+
+    def merge_from(self, path: str):
+        merged = self.db.merge_details_from(path)
+        self.logger.info(f"Merged {merged} app details from {path}")
+
     def refresh_list(self):
+        import requests
+
         url = "http://api.steampowered.com/ISteamApps/GetAppList/v0002/?format=json"
         response = requests.get(url, timeout=self.timeout)
         applist = response.json()
@@ -83,97 +165,359 @@ class SteamDumper:
             self.db.add_app(appid, name)
         self.db.connection.commit()
 
-    def fetch_missing_details(self):
-        sleep_time = 1.2
-        penalty = 0.1
-        grace = 0.01
-        rate_limit_upper_bound_sleep_time = 0
+    def refresh_list_streaming(self):
+        self.app_list.refresh_streaming()
+
+    def refresh_list_delta(self, api_url: str, api_key: str, page_size: int = 50000):
+        self.app_list.refresh_delta(api_url, api_key, page_size)
+
+    def load_rate_limiter(self) -> TokenBucketRateLimiter:
+        # Resume at the rate learned by previous runs rather than
+        # rediscovering it through 429s
+        limiter = TokenBucketRateLimiter()
+        state = self.db.get_metadata("rate_limit_state")
+        if state is not None:
+            limiter.restore(json.loads(state))
+            self.logger.info(
+                f"Resuming at sleep time {limiter.sleep_time:.2f}, upper bound {limiter.upper_bound_sleep_time:.2f}"
+            )
+        return limiter
+
+    def fetch_missing_details(self, store_url: str):
+        import requests
+
+        limiter = self.load_rate_limiter()
+        sleep_time = limiter.sleep_time
+        penalty = limiter.penalty
+        grace = limiter.grace
+        rate_limit_upper_bound_sleep_time = limiter.upper_bound_sleep_time
+
+        def save_rate_limiter():
+            limiter.sleep_time = sleep_time
+            limiter.upper_bound_sleep_time = rate_limit_upper_bound_sleep_time
+            self.db.set_metadata("rate_limit_state", json.dumps(limiter.state()))
+
+        # Same keyset stream and checkpoint as fetch_missing_details_async,
+        # so an interrupted run resumes where it stopped
+        position = int(self.db.get_metadata("fetch_position") or -1)
+        if position >= 0:
+            self.logger.info(f"Resuming after appid {position}")
+        checkpoint = FetchCheckpoint(last_appid=position)
+        appids = checkpoint.track(self.db.iter_apps_missing_details(after_appid=position))
+
+        def save_checkpoint(position: int):
+            self.db.set_metadata("fetch_position", position)
 
-        appids = self.db.list_apps_missing_details()
         app_count = self.db.get_app_count()
-        missing_count = len(appids)
+        missing_count = self.db.count_apps_missing_details()
         missing_pct = missing_count * 100 / app_count
         self.logger.info(f"Total missing {missing_count}, {missing_pct:.2f}%")
         fetched = 0
 
-        with self.progress:
-            task = self.progress.add_task(
-                description="",
-                total=app_count,
-                completed=app_count - missing_count,
-                name="Fetch missing details",
-                sleep=sleep_time,
-            )
-            for appid_row in appids:
-                if self.done_event.is_set():
-                    return
-
-                appid = appid_row["appid"]
-                name = appid_row["name"]
-                self.progress.update(
-                    task,
-                    completed=app_count - missing_count + fetched,
-                    name=self.ellipsise(name),
+        self.metrics.set_gauge("backlog", missing_count)
+        self.metrics.start()
+        try:
+            with self.progress:
+                task = self.progress.add_task(
+                    description="",
+                    total=app_count,
+                    completed=app_count - missing_count,
+                    name="Fetch missing details",
                     sleep=sleep_time,
                 )
-                self.logger.info(f"Fetching details for {name} / {appid}")
-                url = f"https://store.steampowered.com/api/appdetails?appids={
-                    appid}"
-                retry = True
-                while retry:
-                    retry = False
-                    try:
-                        response = requests.get(url, timeout=self.timeout)
-                    except requests.exceptions.RequestException as e:
-                        self.logger.info(f"Exception fetching {url}: {e}")
-                        break
-                    if response.status_code != 200:
-                        self.logger.warning(f"Unexpected server response code {
-                            response.status_code}: {response.headers}")
-                        if response.status_code == 429:
-                            # Rate limited
-                            rate_limit_upper_bound_sleep_time = sleep_time
-                            sleep_time += penalty
-                            self.logger.info(f"Rate limit penalty applied. New sleep time: {
-                                sleep_time}")
-                            self.progress.update(task, name="Paused…", sleep=sleep_time)
-                            time.sleep(120)
-                            retry = True
-                        else:
-                            # Pause and skip, we’ll retry next run anyway
-                            self.progress.update(task, name="Paused…")
-                            time.sleep(30)
-                            break
-                else:
-                    try:
-                        appdetails = response.json()
-                        for appid in appdetails:
-                            self.db.upsert_app_details(
-                                appid, json.dumps(appdetails[appid])
-                            )
-                    except requests.exceptions.JSONDecodeError as err:
-                        self.logger.error(
-                            f"JSON decoding error: {str(err)}, content: {response.content}"
-                        )
-
-                    fetched += 1
+                for appid_row in appids:
+                    if self.done_event.is_set():
+                        save_rate_limiter()
+                        save_checkpoint(checkpoint.position())
+                        return
+
+                    appid = appid_row["appid"]
+                    name = appid_row["name"]
                     self.progress.update(
                         task,
                         completed=app_count - missing_count + fetched,
                         name=self.ellipsise(name),
                         sleep=sleep_time,
                     )
-                    if fetched % 100 == 0:
-                        sleep_time_tmp = sleep_time - grace
-                        if sleep_time_tmp > rate_limit_upper_bound_sleep_time:
-                            sleep_time = sleep_time_tmp
+                    self.logger.info(f"Fetching details for {name} / {appid}")
+                    url = f"{store_url}/api/appdetails?appids={appid}"
+                    retry = True
+                    while retry:
+                        retry = False
+                        start = time.monotonic()
+                        try:
+                            response = requests.get(url, timeout=self.timeout)
+                        except requests.exceptions.RequestException as e:
+                            self.metrics.observe_http("error", time.monotonic() - start)
+                            self.logger.info(f"Exception fetching {url}: {e}")
+                            break
+                        self.metrics.observe_http(
+                            response.status_code, time.monotonic() - start
+                        )
+                        if response.status_code != 200:
+                            self.logger.warning(f"Unexpected server response code {
+                                response.status_code}: {response.headers}")
+                            if response.status_code == 429:
+                                # Rate limited
+                                self.metrics.observe_rate_limited(1 / sleep_time)
+                                limiter.record_rate_limited()
+                                rate_limit_upper_bound_sleep_time = sleep_time
+                                sleep_time += penalty
+                                save_rate_limiter()
+                                self.logger.info(f"Rate limit penalty applied. New sleep time: {
+                                    sleep_time}")
+                                self.progress.update(task, name="Paused…", sleep=sleep_time)
+                                pause = parse_retry_after(
+                                    response.headers.get("Retry-After")
+                                )
+                                time.sleep(pause if pause is not None else 120)
+                                retry = True
+                            else:
+                                # Pause and skip, we’ll retry next run anyway
+                                self.progress.update(task, name="Paused…")
+                                time.sleep(30)
+                                break
+                    else:
+                        try:
+                            appdetails = response.json()
+                            for appid in appdetails:
+                                start = time.monotonic()
+                                self.db.upsert_app_details(
+                                    appid, json.dumps(appdetails[appid])
+                                )
+                                self.metrics.observe_db_write(
+                                    1, time.monotonic() - start
+                                )
+                        except requests.exceptions.JSONDecodeError as err:
+                            self.logger.error(
+                                f"JSON decoding error: {str(err)}, content: {response.content}"
+                            )
+
+                        fetched += 1
+                        self.metrics.set_gauge("backlog", missing_count - fetched)
+                        self.metrics.set_gauge("request_rate", 1 / sleep_time)
+                        self.progress.update(
+                            task,
+                            completed=app_count - missing_count + fetched,
+                            name=self.ellipsise(name),
+                            sleep=sleep_time,
+                        )
+                        if fetched % 100 == 0:
+                            sleep_time_tmp = sleep_time - grace
+                            if sleep_time_tmp > rate_limit_upper_bound_sleep_time:
+                                sleep_time = sleep_time_tmp
+                            save_rate_limiter()
+                            save_checkpoint(checkpoint.position())
+
+                            missing_tmp = missing_count - fetched
+                            missing_tmp_pct = missing_tmp * 100 / app_count
+                            self.logger.info(f"Total missing {missing_tmp} / {
+                                missing_tmp_pct:.2f}%. Sleep time: {sleep_time}")
+
+                        time.sleep(sleep_time)
+
+                    # Skipped apps count as processed too, next run retries them
+                    checkpoint.done(appid_row["appid"])
+        finally:
+            self.metrics.stop()
+
+        save_rate_limiter()
+        # Went through everything, start over next run
+        save_checkpoint(-1)
+
+    def fetch_missing_details_async(self, concurrency: int, store_url: str):
+        app_count = self.db.get_app_count()
+        missing_count = self.db.count_apps_missing_details()
+        missing_pct = missing_count * 100 / app_count
+        self.logger.info(f"Total missing {missing_count}, {missing_pct:.2f}%")
+
+        position = int(self.db.get_metadata("fetch_position") or -1)
+        if position >= 0:
+            self.logger.info(f"Resuming after appid {position}")
+        checkpoint = FetchCheckpoint(last_appid=position)
+
+        self.fetch_details_async(
+            self.db.iter_apps_missing_details(after_appid=position),
+            total=app_count,
+            completed=app_count - missing_count,
+            name="Fetch missing details",
+            concurrency=concurrency,
+            store_url=store_url,
+            checkpoint=checkpoint,
+        )
+
+    def fetch_leased_details(
+        self,
+        concurrency: int,
+        store_url: str,
+        worker_id: str,
+        lease_seconds: float,
+        range_size: int,
+    ):
+        # Cooperates with other workers sharing the database: each claims an
+        # appid range with an expiring lease, keeps it alive while fetching
+        # its missing details, then marks it completed. Ranges of crashed
+        # workers are reclaimed once their lease expires.
+        planned = self.db.plan_fetch_leases(range_size)
+        if planned > 0:
+            self.logger.info(f"Planned {planned} ranges of {range_size} apps")
+
+        # Shared across ranges so the learned rate carries over
+        limiter = self.load_rate_limiter()
+        while not self.done_event.is_set():
+            lease = self.db.claim_fetch_lease(worker_id, lease_seconds)
+            if lease is None:
+                self.logger.info("No ranges left to fetch")
+                return
+
+            (start, end) = lease
+            missing_count = self.db.count_apps_missing_details(start - 1, end)
+            self.logger.info(
+                f"{worker_id} leased range from {start}, {missing_count} missing"
+            )
+
+            heartbeat = LeaseHeartbeat(
+                self.logger, worker_id, start, lease_seconds, db_path=self.db_path
+            )
+            try:
+                self.fetch_details_async(
+                    heartbeat.guard(
+                        self.db.iter_apps_missing_details(
+                            after_appid=start - 1, until_appid=end
+                        )
+                    ),
+                    total=missing_count,
+                    completed=0,
+                    name=f"Range from {start}",
+                    concurrency=concurrency,
+                    store_url=store_url,
+                    limiter=limiter,
+                )
+            finally:
+                heartbeat.stop()
+
+            if heartbeat.lost:
+                continue
+            if self.done_event.is_set():
+                self.db.release_fetch_lease(worker_id, start)
+            else:
+                # Details are committed by now, the writer is closed
+                self.db.complete_fetch_lease(worker_id, start)
+
+    def refresh_stale_details(
+        self, budget: int, stale_days: float, concurrency: int, store_url: str
+    ):
+        stale_before = int(time.time() - stale_days * 86400)
+        appids = self.db.list_apps_to_refresh(budget, stale_before)
+        self.logger.info(f"Scheduled {len(appids)} apps for refresh, budget {budget}")
+
+        self.fetch_details_async(
+            appids,
+            total=len(appids),
+            completed=0,
+            name="Refresh details",
+            concurrency=concurrency,
+            store_url=store_url,
+        )
+
+    def fetch_details_async(
+        self,
+        appids: Iterable[dict],
+        total: int,
+        completed: int,
+        name: str,
+        concurrency: int,
+        store_url: str,
+        checkpoint: FetchCheckpoint | None = None,
+        limiter: TokenBucketRateLimiter | None = None,
+    ):
+        from fetcher import AsyncDetailsFetcher
+
+        if limiter is None:
+            limiter = self.load_rate_limiter()
+        writer = DatabaseWriter(
+            self.logger,
+            db_path=self.db_path,
+            projection=self.projection,
+            keep_raw=self.keep_raw,
+            metrics=self.metrics,
+        )
+        fetched = 0
+        self.metrics.set_gauge("backlog", total - completed)
+
+        if checkpoint is not None:
+            appids = checkpoint.track(appids)
+
+        def save_checkpoint(position: int):
+            # Goes through the writer, so it is committed with the details
+            # fetched before it and never gets ahead of them
+            writer.set_metadata("fetch_position", position)
+
+        def save_rate_limiter():
+            writer.set_metadata("rate_limit_state", json.dumps(limiter.state()))
 
-                        missing_tmp = missing_count - fetched
-                        missing_tmp_pct = missing_tmp * 100 / app_count
-                        self.logger.info(f"Total missing {missing_tmp} / {
-                            missing_tmp_pct:.2f}%. Sleep time: {sleep_time}")
+        def on_error(appid: int, error: str):
+            writer.record_fetch_error(appid, error)
+            if checkpoint is not None:
+                checkpoint.done(appid)
 
-                    time.sleep(sleep_time)
+        with self.progress:
+            task = self.progress.add_task(
+                description="",
+                total=total,
+                completed=completed,
+                name=name,
+                sleep=limiter.sleep_time,
+            )
+
+            def on_fetched(appid: int, name: str):
+                nonlocal fetched
+                fetched += 1
+                self.metrics.set_gauge("backlog", total - completed - fetched)
+                self.metrics.set_gauge("request_rate", 1 / limiter.sleep_time)
+                if checkpoint is not None:
+                    checkpoint.done(appid)
+                self.progress.update(
+                    task,
+                    completed=completed + fetched,
+                    name=self.ellipsise(name),
+                    sleep=limiter.sleep_time,
+                )
+                if fetched % 100 == 0:
+                    save_rate_limiter()
+                    if checkpoint is not None:
+                        save_checkpoint(checkpoint.position())
+                    remaining = total - completed - fetched
+                    remaining_pct = remaining * 100 / total
+                    self.logger.info(f"Total remaining {remaining} / {
+                        remaining_pct:.2f}%. Sleep time: {limiter.sleep_time}")
+
+            fetcher = AsyncDetailsFetcher(
+                limiter=limiter,
+                logger=self.logger,
+                done_event=self.done_event,
+                on_details=writer.upsert_app_details,
+                on_fetched=on_fetched,
+                on_error=on_error,
+                on_rate_limited=save_rate_limiter,
+                concurrency=concurrency,
+                timeout=self.timeout,
+                store_url=store_url,
+                metrics=self.metrics,
+            )
+            self.metrics.start()
+            try:
+                fetcher.run(appids)
+                save_rate_limiter()
+                if checkpoint is not None:
+                    if self.done_event.is_set():
+                        save_checkpoint(checkpoint.position())
+                    else:
+                        # Went through everything, start over next run
+                        save_checkpoint(-1)
+            finally:
+                writer.close()
+                self.metrics.stop()
 
 
 def handle_sigint(signum, frame):
@@ -196,6 +540,36 @@ if __name__ == "__main__":
         default=False,
     )
 
+    parser.add_argument(
+        "--stream-list",
+        help="Whether to parse and bulk insert the list of games incrementally, reporting changes",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--delta-list",
+        help="Whether to only fetch apps modified since the last sync, queueing changed ones for --refresh-stale-details. Needs a Web API key",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--api-key",
+        help="Steam Web API key for --delta-list, defaults to $STEAM_API_KEY",
+        type=str,
+        default=os.environ.get("STEAM_API_KEY"),
+    )
+
+    parser.add_argument(
+        "--api-url",
+        help="Base URL of the Steam Web API",
+        type=str,
+        default="https://api.steampowered.com",
+    )
+
     parser.add_argument(
         "--fetch-missing-details",
         help="Whether to fetch details for apps that are missing them",
@@ -204,6 +578,146 @@ if __name__ == "__main__":
         default=False,
     )
 
+    parser.add_argument(
+        "--refresh-stale-details",
+        help="Whether to re-fetch details by priority: new, then modified since fetched, then unavailable or errored, then oldest",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--budget",
+        help="Maximum number of apps to fetch with --refresh-stale-details",
+        type=int,
+        default=5000,
+    )
+
+    parser.add_argument(
+        "--stale-days",
+        help="Age in days after which details are considered stale",
+        type=float,
+        default=7,
+    )
+
+    parser.add_argument(
+        "--async-fetch",
+        help="Whether to fetch details concurrently, sharing one rate limiter",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        help="Maximum number of in-flight detail requests with --async-fetch",
+        type=int,
+        default=4,
+    )
+
+    parser.add_argument(
+        "--store-url",
+        help="Base URL of the Steam store API",
+        type=str,
+        default="https://store.steampowered.com",
+    )
+
+    parser.add_argument(
+        "--lean",
+        help="Whether to store only a projection of the details fields",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--projection",
+        help="Comma separated details fields to keep with --lean",
+        type=str,
+        default=",".join(DEFAULT_PROJECTION),
+    )
+
+    parser.add_argument(
+        "--keep-raw",
+        help="Whether to also keep the full compressed details with --lean",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--convert-lean",
+        help="Whether to convert already stored details to the --lean projection",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--db",
+        help="Path of the database",
+        type=str,
+        default="data/steam.db",
+    )
+
+    parser.add_argument(
+        "--lease-worker",
+        help="Whether to fetch missing details for appid ranges leased in the database, cooperating with other workers",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--worker-id",
+        help="Identifies this worker in leases",
+        type=str,
+        default=f"{socket.gethostname()}:{os.getpid()}",
+    )
+
+    parser.add_argument(
+        "--lease-seconds",
+        help="How long a lease lasts without a heartbeat",
+        type=float,
+        default=300,
+    )
+
+    parser.add_argument(
+        "--range-size",
+        help="Number of apps per leased range",
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        "--merge-from",
+        help="Database to merge fetched details from, can be repeated",
+        type=str,
+        action="append",
+        default=[],
+    )
+
+    parser.add_argument(
+        "--metrics-textfile",
+        help="Prometheus textfile to periodically rewrite with fetch metrics",
+        type=str,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--stats-log",
+        help="JSONL file to periodically append fetch metrics snapshots to",
+        type=str,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--metrics-interval",
+        help="Seconds between metrics exports",
+        type=float,
+        default=15,
+    )
+
     parser.add_argument(
         "--debug",
         help="Verbose/debug mode",
@@ -231,5 +745,43 @@ if __name__ == "__main__":
     logging.basicConfig(level=verbosity, handlers=[handler])
     logger = logging.getLogger("steam-dumper")
 
-    steam_dumper = SteamDumper(logger, done_event, args.debug)
-    steam_dumper.run(args.refresh_list, args.fetch_missing_details)
+    if args.convert_lean and not args.lean:
+        parser.error("--convert-lean requires --lean")
+    if args.delta_list and args.api_key is None:
+        parser.error("--delta-list requires --api-key or $STEAM_API_KEY")
+
+    projection = args.projection.split(",") if args.lean else None
+    metrics = FetchMetrics(
+        textfile_path=args.metrics_textfile,
+        stats_log_path=args.stats_log,
+        interval=args.metrics_interval,
+    )
+    steam_dumper = SteamDumper(
+        logger,
+        done_event,
+        args.debug,
+        projection=projection,
+        keep_raw=args.keep_raw,
+        metrics=metrics,
+        db_path=args.db,
+    )
+    steam_dumper.run(
+        args.convert_lean,
+        args.refresh_list,
+        args.stream_list,
+        args.fetch_missing_details,
+        args.refresh_stale_details,
+        args.budget,
+        args.stale_days,
+        args.async_fetch,
+        args.concurrency,
+        args.store_url,
+        args.lease_worker,
+        args.worker_id,
+        args.lease_seconds,
+        args.range_size,
+        args.merge_from,
+        args.delta_list,
+        args.api_url,
+        args.api_key,
+    )
@@ -0,0 +1,20 @@
+import importlib
+
+from .rate_limiter import TokenBucketRateLimiter as TokenBucketRateLimiter
+from .rate_limiter import parse_retry_after as parse_retry_after
+from .app_list import AppListRefresher as AppListRefresher
+from .app_list import iter_app_list as iter_app_list
+from .checkpoint import FetchCheckpoint as FetchCheckpoint
+from .metrics import FetchMetrics as FetchMetrics
+
+# Loaded on first use as it pulls in aiohttp
+LAZY_IMPORTS = {
+    "AsyncDetailsFetcher": ".async_fetcher",
+}
+
+
+def __getattr__(name: str):
+    if name in LAZY_IMPORTS:
+        module = importlib.import_module(LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,122 @@
+import codecs
+import json
+import logging
+import re
+import time
+
+from dataclasses import dataclass
+from threading import Event
+from typing import Iterable, Iterator
+
+from db import Database
+
+SEPARATORS = re.compile(r"[\s,]*")
+APPS_ARRAY_START = re.compile(r'"apps"\s*:\s*\[')
+
+
+def iter_app_list(chunks: Iterable[bytes]) -> Iterator[dict]:
+    # Incrementally parses the `applist.apps` array of a GetAppList response,
+    # yielding one app at a time so the full list is never held in memory.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_array = False
+
+    for chunk in chunks:
+        buffer += utf8.decode(chunk)
+
+        if not in_array:
+            match = APPS_ARRAY_START.search(buffer)
+            if match is None:
+                continue
+            buffer = buffer[match.end() :]
+            in_array = True
+
+        pos = 0
+        while True:
+            pos = SEPARATORS.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                return
+            try:
+                app, pos_end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Incomplete object, wait for the next chunk
+                break
+            pos = pos_end
+            yield app
+
+        buffer = buffer[pos:]
+
+
+@dataclass
+class AppListRefresher:
+    # Keeps steam_apps in line with the store's list of apps, either from the
+    # full list or from the apps modified since the last sync
+    db: Database
+    logger: logging.Logger
+    done_event: Event
+    # Timeout for HTTP requests
+    timeout: float = 20
+
+    def refresh_streaming(self):
+        import requests
+
+        url = "http://api.steampowered.com/ISteamApps/GetAppList/v0002/?format=json"
+        with requests.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            counts = self.db.refresh_apps(
+                iter_app_list(response.iter_content(chunk_size=1 << 16))
+            )
+        self.logger.info(
+            f"App list refreshed: {counts['new']} new, {counts['renamed']} renamed, {counts['gone']} gone"
+        )
+
+    def refresh_delta(self, api_url: str, api_key: str, page_size: int = 50000):
+        # Pages through the apps modified since the last sync. On the first
+        # sync everything is listed, but nothing is queued for refetch as
+        # there is no telling what changed.
+        import requests
+
+        modified_since = self.db.get_metadata("app_list_modified_since")
+        # Taken before the first page so changes made while paging are
+        # listed again next time
+        synced_at = int(time.time())
+        url = f"{api_url}/IStoreService/GetAppList/v1/"
+        params = {
+            "key": api_key,
+            "max_results": page_size,
+            "include_games": 1,
+            "include_dlc": 1,
+            "include_software": 1,
+            "include_videos": 1,
+            "include_hardware": 1,
+        }
+        if modified_since is not None:
+            params["if_modified_since"] = modified_since
+
+        totals = {"new": 0, "renamed": 0, "queued": 0}
+        last_appid = 0
+        while not self.done_event.is_set():
+            response = requests.get(
+                url, params={**params, "last_appid": last_appid}, timeout=self.timeout
+            )
+            response.raise_for_status()
+            page = response.json()["response"]
+            apps = page.get("apps", [])
+
+            counts = self.db.apply_app_list_delta(
+                apps, queue_refetch=modified_since is not None
+            )
+            for key in totals:
+                totals[key] += counts[key]
+
+            if not page.get("have_more_results") or len(apps) == 0:
+                self.db.set_metadata("app_list_modified_since", synced_at)
+                break
+            last_appid = page.get("last_appid", apps[-1]["appid"])
+
+        self.logger.info(
+            f"App list delta applied: {totals['new']} new, {totals['renamed']} renamed, {totals['queued']} queued for refetch"
+        )
@@ -0,0 +1,138 @@
+import aiohttp
+import asyncio
+import json
+import logging
+import time
+
+from dataclasses import dataclass
+from threading import Event
+from typing import Callable, Iterable
+
+from .metrics import FetchMetrics
+from .rate_limiter import TokenBucketRateLimiter, parse_retry_after
+
+
+@dataclass
+class AsyncDetailsFetcher:
+    limiter: TokenBucketRateLimiter
+    logger: logging.Logger
+    done_event: Event
+    # Called with (appid, details JSON string) for each entry in a response
+    on_details: Callable[[str, str], None]
+    # Called with (appid, name) once an app has been processed
+    on_fetched: Callable[[int, str], None] = lambda appid, name: None
+    # Called with (appid, error) when an app could not be fetched
+    on_error: Callable[[int, str], None] = lambda appid, error: None
+    # Called once the limiter has been penalised for a 429
+    on_rate_limited: Callable[[], None] = lambda: None
+    concurrency: int = 4
+    timeout: float = 20
+    # Pause before skipping an app on unexpected server responses
+    error_pause: float = 30
+    store_url: str = "https://store.steampowered.com"
+    metrics: FetchMetrics | None = None
+    # Whether apps come from an iterator that blocks, e.g. on a queue. It is
+    # then advanced from a thread so the event loop keeps running.
+    blocking_source: bool = False
+    # Whether on_details and on_fetched block, e.g. on a bounded queue. They
+    # are then called from a thread so other in-flight requests keep going.
+    blocking_sink: bool = False
+
+    def run(self, apps: Iterable[dict]):
+        asyncio.run(self.fetch_all(apps))
+
+    async def fetch_all(self, apps: Iterable[dict]):
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(
+            timeout=timeout, connector=connector
+        ) as session:
+            workers = [
+                asyncio.create_task(self.worker(session, queue))
+                for _ in range(self.concurrency)
+            ]
+            apps = iter(apps)
+            while not self.done_event.is_set():
+                if self.blocking_source:
+                    app = await asyncio.to_thread(next, apps, None)
+                else:
+                    app = next(apps, None)
+                if app is None:
+                    break
+                await queue.put(app)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+    async def worker(self, session: aiohttp.ClientSession, queue: asyncio.Queue):
+        while True:
+            app = await queue.get()
+            if app is None:
+                return
+            if self.done_event.is_set():
+                continue
+            await self.fetch(session, app["appid"], app["name"])
+
+    async def fetch(self, session: aiohttp.ClientSession, appid: int, name: str):
+        url = f"{self.store_url}/api/appdetails?appids={appid}"
+        while not self.done_event.is_set():
+            await self.limiter.acquire()
+            self.logger.info(f"Fetching details for {name} / {appid}")
+            start = time.monotonic()
+            try:
+                async with session.get(url) as response:
+                    status = response.status
+                    headers = response.headers
+                    body = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.metrics is not None:
+                    self.metrics.observe_http("error", time.monotonic() - start)
+                self.logger.info(f"Exception fetching {url}: {e}")
+                self.on_error(appid, f"{type(e).__name__}: {e}")
+                return
+
+            if self.metrics is not None:
+                self.metrics.observe_http(status, time.monotonic() - start)
+
+            if status == 429:
+                self.logger.warning(f"Rate limited: {headers}")
+                if self.metrics is not None:
+                    self.metrics.observe_rate_limited(1 / self.limiter.sleep_time)
+                if self.limiter.penalise(parse_retry_after(headers.get("Retry-After"))):
+                    self.logger.info(
+                        f"Rate limit penalty applied. New sleep time: {self.limiter.sleep_time}"
+                    )
+                    self.on_rate_limited()
+                continue
+
+            if status != 200:
+                self.logger.warning(
+                    f"Unexpected server response code {status}: {headers}"
+                )
+                self.on_error(appid, f"HTTP {status}")
+                # Pause and skip, we’ll retry next run anyway
+                await asyncio.sleep(self.error_pause)
+                return
+
+            try:
+                appdetails = json.loads(body)
+                for key in appdetails:
+                    await self.call_sink(
+                        self.on_details, key, json.dumps(appdetails[key])
+                    )
+            except json.JSONDecodeError as err:
+                self.logger.error(f"JSON decoding error: {str(err)}, content: {body}")
+                # Recorded as an error so the app isn't taken as fetched
+                self.on_error(appid, f"JSONDecodeError: {err}")
+                return
+
+            self.limiter.reward()
+            await self.call_sink(self.on_fetched, appid, name)
+            return
+
+    async def call_sink(self, callback: Callable, *args):
+        if self.blocking_sink:
+            await asyncio.to_thread(callback, *args)
+        else:
+            callback(*args)
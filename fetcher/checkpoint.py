@@ -0,0 +1,27 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+
+@dataclass
+class FetchCheckpoint:
+    # Tracks the low-water mark of apps handed out in appid order: every app
+    # up to `position()` has been processed, whatever the concurrency.
+    last_appid: int = -1
+
+    def __post_init__(self):
+        self.outstanding = OrderedDict()
+
+    def track(self, apps: Iterable[dict]) -> Iterator[dict]:
+        for app in apps:
+            self.outstanding[app["appid"]] = True
+            self.last_appid = app["appid"]
+            yield app
+
+    def done(self, appid: int):
+        self.outstanding.pop(appid, None)
+
+    def position(self) -> int:
+        if len(self.outstanding) > 0:
+            return next(iter(self.outstanding)) - 1
+        return self.last_appid
@@ -0,0 +1,185 @@
+import json
+import os
+import time
+
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+
+HTTP_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20]
+DB_WRITE_LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5]
+
+
+@dataclass
+class Histogram:
+    buckets: list[float]
+
+    def __post_init__(self):
+        # Cumulative counts per upper bound, the last one being +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": dict(
+                zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)
+            ),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+@dataclass
+class FetchMetrics:
+    # Collects hot path metrics from the fetcher and DB writer, and
+    # periodically rewrites a Prometheus textfile and/or appends a JSONL
+    # snapshot so long runs can be graphed and alerted on.
+    textfile_path: str | None = None
+    stats_log_path: str | None = None
+    interval: float = 15
+    prefix: str = "steam_dumper"
+    # Recent 429 events kept in snapshots
+    max_rate_limit_events: int = 100
+
+    http_latency: Histogram = field(
+        default_factory=lambda: Histogram(HTTP_LATENCY_BUCKETS)
+    )
+    db_write_latency: Histogram = field(
+        default_factory=lambda: Histogram(DB_WRITE_LATENCY_BUCKETS)
+    )
+
+    def __post_init__(self):
+        self.lock = Lock()
+        self.status_codes = {}
+        self.rate_limit_events = []
+        self.rate_limited = 0
+        self.db_write_rows = 0
+        # Last known values of gauges such as the request rate or backlog
+        self.gauges = {}
+        self.stop_event = Event()
+        self.thread = None
+
+    def observe_http(self, status: int | str, seconds: float):
+        with self.lock:
+            self.http_latency.observe(seconds)
+            key = str(status)
+            self.status_codes[key] = self.status_codes.get(key, 0) + 1
+
+    def observe_rate_limited(self, request_rate: float):
+        with self.lock:
+            self.rate_limited += 1
+            self.rate_limit_events.append(
+                {"ts": time.time(), "request_rate": request_rate}
+            )
+            del self.rate_limit_events[: -self.max_rate_limit_events]
+            self.gauges["rate_limited_request_rate"] = request_rate
+
+    def observe_db_write(self, rows: int, seconds: float):
+        with self.lock:
+            self.db_write_latency.observe(seconds)
+            self.db_write_rows += rows
+
+    def set_gauge(self, name: str, value: float):
+        with self.lock:
+            self.gauges[name] = value
+
+    def start(self):
+        if self.textfile_path is None and self.stats_log_path is None:
+            return
+        # Cleared as the same metrics are started and stopped once per run,
+        # e.g. per leased range
+        self.stop_event.clear()
+        self.thread = Thread(target=self.run, name="metrics", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.export()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.export()
+
+    def export(self):
+        snapshot = self.snapshot()
+        if self.textfile_path is not None:
+            # Written aside and renamed so the collector never reads a partial file
+            tmp_path = f"{self.textfile_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.prometheus(snapshot))
+            os.replace(tmp_path, self.textfile_path)
+        if self.stats_log_path is not None:
+            with open(self.stats_log_path, "a") as f:
+                f.write(json.dumps(snapshot) + "\n")
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "ts": time.time(),
+                "http_latency": self.http_latency.snapshot(),
+                "status_codes": dict(self.status_codes),
+                "rate_limited": self.rate_limited,
+                "rate_limit_events": list(self.rate_limit_events),
+                "db_write_latency": self.db_write_latency.snapshot(),
+                "db_write_rows": self.db_write_rows,
+                "gauges": dict(self.gauges),
+            }
+
+    def prometheus(self, snapshot: dict) -> str:
+        lines = []
+
+        def histogram(name: str, help: str, values: dict):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {help}")
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in values["buckets"].items():
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum {values['sum']}")
+            lines.append(f"{metric}_count {values['count']}")
+
+        histogram(
+            "http_request_duration_seconds",
+            "Latency of appdetails requests",
+            snapshot["http_latency"],
+        )
+
+        metric = f"{self.prefix}_http_responses_total"
+        lines.append(f"# HELP {metric} Responses by status code")
+        lines.append(f"# TYPE {metric} counter")
+        for code, count in sorted(snapshot["status_codes"].items()):
+            lines.append(f'{metric}{{code="{code}"}} {count}')
+
+        metric = f"{self.prefix}_rate_limited_total"
+        lines.append(f"# HELP {metric} Number of 429 responses")
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {snapshot['rate_limited']}")
+
+        histogram(
+            "db_write_duration_seconds",
+            "Latency of grouped DB commits",
+            snapshot["db_write_latency"],
+        )
+
+        metric = f"{self.prefix}_db_write_rows_total"
+        lines.append(f"# HELP {metric} Number of rows written")
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {snapshot['db_write_rows']}")
+
+        for name, value in sorted(snapshot["gauges"].items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,126 @@
+import asyncio
+import email.utils
+import time
+
+from dataclasses import dataclass
+
+
+@dataclass
+class TokenBucketRateLimiter:
+    # Seconds between requests, i.e. the inverse of the refill rate
+    sleep_time: float = 1.2
+    # Added to sleep_time on each 429
+    penalty: float = 0.1
+    # Removed from sleep_time every grace_interval successful requests
+    grace: float = 0.01
+    grace_interval: int = 100
+    # Last sleep_time that got us rate limited, we never go back down to it
+    upper_bound_sleep_time: float = 0
+    # How long everyone backs off after a 429
+    penalty_pause: float = 120
+    # Max tokens that can accumulate, i.e. burst size
+    capacity: float = 1
+    # Number of recent 429s kept in the persisted state
+    max_history: int = 20
+
+    def __post_init__(self):
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.successes = 0
+        # asyncio.Lock binds to the loop it is first contended on, and the
+        # limiter outlives loops when shared across asyncio.run calls
+        self.lock = None
+        self.lock_loop = None
+        # Recent 429s, with the sleep time that triggered them
+        self.history = []
+
+    def refill(self, now: float):
+        # No tokens accrue while paused
+        start = max(self.last_refill, self.paused_until)
+        if now > start:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - start) / self.sleep_time
+            )
+        self.last_refill = now
+
+    def is_paused(self) -> bool:
+        return time.monotonic() < self.paused_until
+
+    def get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self.lock_loop is not loop:
+            self.lock = asyncio.Lock()
+            self.lock_loop = loop
+        return self.lock
+
+    async def acquire(self):
+        # The lock queues waiters so tokens are handed out in order
+        async with self.get_lock():
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) * self.sleep_time)
+
+    def penalise(self, pause: float | None = None) -> bool:
+        # Requests already in flight when we got rate limited will likely
+        # also come back as 429, only penalise once per pause.
+        if self.is_paused():
+            return False
+
+        self.record_rate_limited()
+        self.upper_bound_sleep_time = self.sleep_time
+        self.sleep_time += self.penalty
+        self.tokens = 0
+        if pause is None:
+            pause = self.penalty_pause
+        self.paused_until = time.monotonic() + pause
+        return True
+
+    def record_rate_limited(self):
+        self.history.append({"ts": time.time(), "sleep_time": self.sleep_time})
+        del self.history[: -self.max_history]
+
+    def state(self) -> dict:
+        return {
+            "sleep_time": self.sleep_time,
+            "upper_bound_sleep_time": self.upper_bound_sleep_time,
+            "history": self.history,
+        }
+
+    def restore(self, state: dict):
+        self.sleep_time = state.get("sleep_time", self.sleep_time)
+        self.upper_bound_sleep_time = state.get(
+            "upper_bound_sleep_time", self.upper_bound_sleep_time
+        )
+        self.history = state.get("history", [])
+
+    def reward(self):
+        self.successes += 1
+        if self.successes % self.grace_interval == 0:
+            sleep_time = self.sleep_time - self.grace
+            if sleep_time > self.upper_bound_sleep_time:
+                self.sleep_time = sleep_time
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    # Retry-After is either a number of seconds or an HTTP date
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import argparse
+import itertools
+import json
+import logging
+import os
+
+from rich.logging import RichHandler
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    SpinnerColumn,
+    TimeRemainingColumn,
+)
+
+from bench import SYNTHETIC_MARKER, SyntheticCatalog, blocklist_from_config
+from db import Database
+
+
+def generate(logger, db_path: str, catalog: SyntheticCatalog, batch_size: int):
+    db = Database(db_path=db_path)
+
+    counts = db.refresh_apps(catalog.apps())
+    logger.info(f"Inserted {counts['new']} apps")
+
+    progress = Progress(
+        SpinnerColumn(spinner_name="moon"),
+        BarColumn(bar_width=None),
+        "[progress.percentage]{task.percentage:>3.1f}%",
+        "•",
+        MofNCompleteColumn(),
+        "•",
+        TimeRemainingColumn(elapsed_when_finished=True),
+    )
+    with progress:
+        task = progress.add_task(description="", total=catalog.app_count)
+        for batch in itertools.batched(catalog.apps(), batch_size):
+            with db.connection:
+                cursor = db.connection.cursor()
+                for app in batch:
+                    details = catalog.details(app["appid"], app["name"])
+                    db.write_app_details(cursor, app["appid"], details)
+            progress.update(task, advance=len(batch))
+
+    # Lets the benchmark, and later runs with --force, tell this database
+    # apart from a real cache
+    db.set_metadata(
+        SYNTHETIC_MARKER,
+        json.dumps({"apps": catalog.app_count, "seed": catalog.seed}),
+    )
+    db.connection.execute("analyze")
+    db.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generates a synthetic Steam catalog database for benchmarking"
+    )
+
+    parser.add_argument(
+        "--apps",
+        help="Number of apps to generate",
+        type=int,
+        default=200000,
+    )
+
+    parser.add_argument(
+        "--db",
+        help="Path of the database to create",
+        type=str,
+        required=True,
+    )
+
+    parser.add_argument(
+        "--seed",
+        help="Random seed, the same seed and size always give the same catalog",
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--config",
+        help="Ruleset whose list filter values are sprinkled into the catalog",
+        type=str,
+        default="steam-games-to-ignore.yaml",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        help="Number of apps per transaction",
+        type=int,
+        default=5000,
+    )
+
+    parser.add_argument(
+        "--force",
+        help="Whether to overwrite an existing database",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    args = parser.parse_args()
+
+    handler = RichHandler(show_time=False, show_level=False, show_path=False)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level="INFO", handlers=[handler])
+    logger = logging.getLogger("steam-synthetic")
+
+    if os.path.exists(args.db):
+        if not args.force:
+            parser.error(f"{args.db} already exists, use --force to overwrite it")
+        if Database(db_path=args.db).get_metadata(SYNTHETIC_MARKER) is None:
+            parser.error(f"{args.db} was not generated by this script, not overwriting it")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    catalog = SyntheticCatalog(
+        app_count=args.apps,
+        seed=args.seed,
+        blocklist=blocklist_from_config(args.config),
+    )
+    generate(logger, args.db, catalog, args.batch_size)
+    logger.info(f"Generated {args.apps} apps in {args.db}")
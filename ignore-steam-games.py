@@ -4,8 +4,6 @@ import argparse
 import logging
 import signal
 from threading import Event
-import time
-import yaml
 
 from rich.console import Console
 from rich.logging import RichHandler
@@ -18,20 +16,33 @@ from rich.progress import (
     TimeRemainingColumn,
 )
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-
-from db import Database
+# selenium, and whatever of db, fetcher and ignorer needs numpy, asyncio,
+# aiohttp or requests, are imported where used so dry runs start fast
+from db import Database, DatabaseWriter
+from ignorer import BrowserWorkerPool, CandidateFinder, login_to_steam
 
 
 class SteamIgnoreGames:
-    def __init__(self, logger, done_event: Event):
-        self.db = Database()
+    def __init__(
+        self,
+        logger,
+        done_event: Event,
+        db_path: str = "data/steam.db",
+        snapshot: bool = False,
+        cache: bool = False,
+    ):
+        self.db_path = db_path
+        self.db = Database(db_path=db_path)
         self.logger = logger
         self.done_event = done_event
+        self.candidates = CandidateFinder(
+            logger, self.db, db_path=db_path, snapshot=snapshot, cache=cache
+        )
+
+        # How long to wait for a click on the ignore button to register, and
+        # how many times to try
+        self.ignore_timeout = 2
+        self.ignore_attempts = 2
 
         width = Console().width
         self.max_name_width = int(width / 4)
@@ -63,15 +74,50 @@ class SteamIgnoreGames:
 
         return left + "…" + right
 
-    def login_to_steam(self, driver):
-        driver.get("https://store.steampowered.com/login/")
+    def new_fast_driver(self):
+        # Headless, no images, media or fonts, and pages are handed over as
+        # soon as the DOM is ready. CSS is kept as the ignore state is only
+        # visible through it.
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--autoplay-policy=user-required")
+        options.page_load_strategy = "eager"
+        options.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
 
-        wait = WebDriverWait(driver, 60)
-        wait.until(EC.title_is("Welcome to Steam"))
+        driver = webdriver.Chrome(options=options)
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd(
+            "Network.setBlockedURLs",
+            {
+                "urls": [
+                    "*.jpg",
+                    "*.jpeg",
+                    "*.png",
+                    "*.gif",
+                    "*.webp",
+                    "*.webm",
+                    "*.mp4",
+                    "*.m3u8",
+                    "*.mpd",
+                    "*.woff",
+                    "*.woff2",
+                    "*.ttf",
+                ]
+            },
+        )
+        return driver
 
-        self.logger.debug("Logged in")
+    def ignore_game(self, driver, appid, name) -> bool:
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
 
-    def ignore_game(self, driver, appid, name):
         game_url = f"https://store.steampowered.com/app/{appid}/"
         self.logger.debug(f"Loading game page: {game_url}")
         driver.get(game_url)
@@ -89,97 +135,117 @@ class SteamIgnoreGames:
         self.logger.debug(ignore, ignore.is_displayed())
         self.logger.debug(ignored, ignored.is_displayed())
 
-        # TODO: rewrite this logic and add retries or wait until ignored is displayed iso using a sleep
         if ignored.is_displayed():
             self.logger.debug(f"{name} is already ignored, skipping")
         else:
-            ignoreBtn.click()
-            time.sleep(1)
+            for attempt in range(1, self.ignore_attempts + 1):
+                # The button toggles, don't undo a click that landed late
+                if not ignored.is_displayed():
+                    ignoreBtn.click()
+                try:
+                    WebDriverWait(driver, self.ignore_timeout).until(
+                        EC.visibility_of(ignored)
+                    )
+                    break
+                except TimeoutException:
+                    self.logger.debug(f"{name} not ignored yet, attempt {attempt}")
             self.logger.debug(f"Ignored {name}: {ignored.is_displayed()}")
-        # We want the upsert regardless
-        if ignored.is_displayed():
-            self.db.upsert_game_ignored(appid)
-
-    def get_games_for_criteria(self, type, properties):
-        if "kind" not in properties or "values" not in properties:
-            self.logger.warning(f"No kind/values for type {type}, ignoring")
-            return
-
-        games = []
-        for value in properties["values"]:
-            if properties["kind"] == "list":
-                games.extend(self.db.list_apps_array_filter(type, value))
-            elif properties["kind"] == "value":
-                games.extend(self.db.list_apps_value_filter(type, value))
-            else:
-                self.logger.warning(f"Unknown filter kind, ignoring: {properties}")
-
-        return games
-
-    def get_games_for_filters(self, filters, games, ignored_games):
-        games = {}
-        ignored_games = {}
-        for type in filters:
-            try:
-                properties = filters[type]
-            except KeyError:
-                self.logger.warning(
-                    f"Invalid configuration: no properties for type {type}, ignoring"
-                )
-                continue
-
-            games_tmp = self.get_games_for_criteria(type, properties)
-            if games_tmp is not None and len(games_tmp) > 0:
-                self.logger.info(f"Found {len(games_tmp)} games for filter `{type}`")
-                for game_tmp in games_tmp:
-                    appid = game_tmp["appid"]
-                    if appid not in games and not game_tmp["ignored"]:
-                        games[appid] = game_tmp
-                    if appid not in ignored_games and game_tmp["ignored"]:
-                        ignored_games[appid] = True
-        return (games, ignored_games)
-
-    def get_games_for_queries(self, queries, games, ignored_games):
-        games = {}
-        ignored_games = {}
-        for query in queries:
-            try:
-                description = query["description"]
-                q = query["query"]
-            except KeyError:
-                self.logger.warning(
-                    f"Invalid configuration: no description or query in {query}"
-                )
-                continue
-
-            games_tmp = self.db.list_apps_for_query(q)
-            if games_tmp is not None and len(games_tmp) > 0:
-                self.logger.info(
-                    f"Found {len(games_tmp)} games for query `{description}`"
-                )
-                for game_tmp in games_tmp:
-                    appid = game_tmp["appid"]
-                    if appid not in games and not game_tmp["ignored"]:
-                        games[appid] = game_tmp
-                    if appid not in ignored_games and game_tmp["ignored"]:
-                        ignored_games[appid] = True
-
-        return (games, ignored_games)
-
-    def run(self, dry_run: bool):
-        games = {}
-        ignored_games = {}
-        with open("steam-games-to-ignore.yaml", "r") as f:
-            y = yaml.safe_load(f)
-            map = {
-                "filters": self.get_games_for_filters,
-                "queries": self.get_games_for_queries,
-            }
-            for mode, func in map.items():
-                if mode in y:
-                    (games_tmp, ignored_games_tmp) = func(y[mode], games, ignored_games)
-                    games |= games_tmp
-                    ignored_games |= ignored_games_tmp
+        # Callers want the upsert regardless
+        return ignored.is_displayed()
+
+    def ignore_games_http(
+        self, driver, games: dict, concurrency: int, store_url: str, task
+    ):
+        # The browser is only needed to log in, its session cookies are then
+        # reused to call the ignore endpoint directly
+        from fetcher import TokenBucketRateLimiter
+        from ignorer import HttpGameIgnorer
+
+        cookies = driver.get_cookies()
+        driver.quit()
+
+        # Start slower than the details API, these calls change the account
+        limiter = TokenBucketRateLimiter(sleep_time=0.5, penalty=0.5, grace=0.05)
+        writer = DatabaseWriter(self.logger, db_path=self.db_path)
+
+        def on_done(appid: int, name: str):
+            self.progress.update(task, name=self.ellipsise(name), advance=1)
+
+        ignorer = HttpGameIgnorer(
+            cookies=cookies,
+            limiter=limiter,
+            logger=self.logger,
+            done_event=self.done_event,
+            on_ignored=lambda appid, name: writer.upsert_game_ignored(appid),
+            on_done=on_done,
+            concurrency=concurrency,
+            store_url=store_url,
+        )
+        try:
+            ignorer.run(games)
+        finally:
+            writer.close()
+
+    def ignore_games_pool(
+        self,
+        driver,
+        games: dict,
+        workers: int,
+        fast_browser: bool,
+        store_url: str,
+        task,
+    ):
+        # Other browsers reuse the login of the first one
+        from selenium import webdriver
+
+        cookies = driver.get_cookies()
+        driver.quit()
+
+        # Single writer so workers don't contend on SQLite
+        writer = DatabaseWriter(self.logger, db_path=self.db_path)
+
+        def on_done(appid: int, name: str):
+            self.progress.update(task, name=self.ellipsise(name), advance=1)
+
+        pool = BrowserWorkerPool(
+            cookies=cookies,
+            logger=self.logger,
+            done_event=self.done_event,
+            new_driver=self.new_fast_driver if fast_browser else webdriver.Chrome,
+            ignore_game=self.ignore_game,
+            on_ignored=lambda appid, name: writer.upsert_game_ignored(appid),
+            on_done=on_done,
+            workers=workers,
+            store_url=store_url,
+        )
+        try:
+            pool.run(games)
+        finally:
+            writer.close()
+
+    def sync_ignored_games(self, driver, games: dict, store_url: str) -> dict:
+        from ignorer import fetch_ignored_appids
+
+        ignored = fetch_ignored_appids(driver.get_cookies(), store_url)
+        self.db.upsert_games_ignored(ignored)
+        self.logger.info(f"Synced {len(ignored)} games already ignored by the account")
+
+        return {appid: name for appid, name in games.items() if appid not in ignored}
+
+    def get_candidates(self, config_path: str = "steam-games-to-ignore.yaml"):
+        return self.candidates.get_candidates(config_path)
+
+    def run(
+        self,
+        dry_run: bool,
+        sync_ignored: bool,
+        http_ignore: bool,
+        concurrency: int,
+        browsers: int,
+        fast_browser: bool,
+        store_url: str,
+    ):
+        (games, ignored_games) = self.get_candidates()
 
         ignored_total = len(ignored_games)
         self.logger.info(f"{ignored_total} unique games already ignored")
@@ -191,17 +257,35 @@ class SteamIgnoreGames:
         self.logger.info(f"{total} unique games to ignore")
 
         if not dry_run:
+            from selenium import webdriver
+
             driver = webdriver.Chrome()
-            self.login_to_steam(driver)
+            login_to_steam(driver, self.logger)
+
+            if sync_ignored:
+                games = self.sync_ignored_games(driver, games, store_url)
+                total = len(games)
+                self.logger.info(f"{total} unique games left to ignore")
 
         with self.progress:
             task = self.progress.add_task(description="", total=total, name="")
-            for appid, game in games.items():
-                name = game["name"]
+            if not dry_run and http_ignore:
+                self.ignore_games_http(driver, games, concurrency, store_url, task)
+                return
+            if not dry_run and (browsers > 1 or fast_browser):
+                # The login browser has to be visible, fast browsers are
+                # started separately with its cookies
+                self.ignore_games_pool(
+                    driver, games, browsers, fast_browser, store_url, task
+                )
+                return
+
+            for appid, name in games.items():
                 self.progress.update(task, name=self.ellipsise(name))
 
                 if not dry_run:
-                    self.ignore_game(driver, appid, name)
+                    if self.ignore_game(driver, appid, name):
+                        self.db.upsert_game_ignored(appid)
 
                 self.progress.update(task, advance=1)
 
@@ -229,6 +313,67 @@ if __name__ == "__main__":
         default=True,
     )
 
+    parser.add_argument(
+        "--sync-ignored",
+        help="Whether to fetch the account's ignored games once after login and skip them",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=True,
+    )
+
+    parser.add_argument(
+        "--http-ignore",
+        help="Whether to ignore games through direct HTTP calls once logged in, instead of through the browser",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        help="Maximum number of in-flight ignore requests with --http-ignore",
+        type=int,
+        default=4,
+    )
+
+    parser.add_argument(
+        "--browsers",
+        help="Number of browser sessions ignoring games in parallel, sharing one login",
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--fast-browser",
+        help="Whether to ignore games in headless browsers that skip images, media and fonts",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--snapshot",
+        help="Whether to evaluate list/value filters over a memory-mapped snapshot of the catalog, rebuilt when details change",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=True,
+    )
+
+    parser.add_argument(
+        "--cache",
+        help="Whether to reuse the results of rules that are unchanged since the last run, as long as details and ignored games are unchanged too",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=True,
+    )
+
+    parser.add_argument(
+        "--store-url",
+        help="Base URL of the Steam store",
+        type=str,
+        default="https://store.steampowered.com",
+    )
+
     parser.add_argument(
         "--debug",
         help="Verbose/debug mode",
@@ -256,5 +401,13 @@ if __name__ == "__main__":
     logging.basicConfig(level=verbosity, handlers=[handler])
     logger = logging.getLogger("steam-ignore")
 
-    sig = SteamIgnoreGames(logger, done_event)
-    sig.run(args.dry_run)
+    sig = SteamIgnoreGames(logger, done_event, snapshot=args.snapshot, cache=args.cache)
+    sig.run(
+        args.dry_run,
+        args.sync_ignored,
+        args.http_ignore,
+        args.concurrency,
+        args.browsers,
+        args.fast_browser,
+        args.store_url,
+    )
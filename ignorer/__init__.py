@@ -0,0 +1,19 @@
+import importlib
+
+from .browser_pool import BrowserWorkerPool as BrowserWorkerPool
+from .candidates import CandidateFinder as CandidateFinder
+from .login import login_to_steam as login_to_steam
+from .rules import CompiledRules as CompiledRules
+
+# Loaded on first use as they pull in aiohttp and requests
+LAZY_IMPORTS = {
+    "HttpGameIgnorer": ".http_ignorer",
+    "fetch_ignored_appids": ".userdata",
+}
+
+
+def __getattr__(name: str):
+    if name in LAZY_IMPORTS:
+        module = importlib.import_module(LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
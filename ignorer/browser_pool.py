@@ -0,0 +1,84 @@
+import logging
+import queue
+
+from dataclasses import dataclass
+from threading import Event, Thread
+from typing import Callable
+
+
+@dataclass
+class BrowserWorkerPool:
+    # Splits games across several browser sessions that share the cookies of
+    # a single login. Each worker pulls from a shared queue, so a worker that
+    # fails restarts its browser and carries on without losing progress.
+    cookies: list[dict]
+    logger: logging.Logger
+    done_event: Event
+    # Creates a new browser session
+    new_driver: Callable[[], any]
+    # Called with (driver, appid, name), returns whether the game is ignored
+    ignore_game: Callable[[any, int, str], bool]
+    # Called with (appid, name) once an app is ignored
+    on_ignored: Callable[[int, str], None] = lambda appid, name: None
+    # Called with (appid, name) once an app has been processed, ignored or not
+    on_done: Callable[[int, str], None] = lambda appid, name: None
+    workers: int = 4
+    max_attempts: int = 3
+    store_url: str = "https://store.steampowered.com"
+
+    def run(self, games: dict[int, str]):
+        self.queue = queue.Queue()
+        for appid, name in games.items():
+            self.queue.put((appid, name, 1))
+
+        threads = [
+            Thread(target=self.worker, name=f"browser-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def start_driver(self):
+        driver = self.new_driver()
+        # Cookies can only be set for the domain currently loaded
+        driver.get(f"{self.store_url}/")
+        for cookie in self.cookies:
+            driver.add_cookie(cookie)
+        return driver
+
+    def worker(self):
+        driver = None
+        try:
+            while not self.done_event.is_set():
+                try:
+                    (appid, name, attempt) = self.queue.get_nowait()
+                except queue.Empty:
+                    return
+
+                try:
+                    if driver is None:
+                        driver = self.start_driver()
+                    if self.ignore_game(driver, appid, name):
+                        self.on_ignored(appid, name)
+                except Exception as e:
+                    self.logger.warning(
+                        f"Browser failed on {name} / {appid}, attempt {attempt}: {e}"
+                    )
+                    if attempt < self.max_attempts:
+                        self.queue.put((appid, name, attempt + 1))
+                    else:
+                        self.on_done(appid, name)
+                    if driver is not None:
+                        try:
+                            driver.quit()
+                        except Exception:
+                            pass
+                        driver = None
+                    continue
+
+                self.on_done(appid, name)
+        finally:
+            if driver is not None:
+                driver.quit()
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import yaml
+
+from dataclasses import dataclass
+from functools import partial
+
+from db import Database
+
+
+@dataclass
+class CandidateFinder:
+    # Resolves the filters and queries of steam-games-to-ignore.yaml over the
+    # whole catalog into the games to ignore
+    logger: logging.Logger
+    db: Database
+    db_path: str = "data/steam.db"
+    # Whether list/value filters are evaluated over a CatalogSnapshot rather
+    # than in SQL
+    snapshot: bool = False
+    # Whether rows of each rule are cached in the database until the rule or
+    # the data changes
+    cache: bool = False
+
+    def __post_init__(self):
+        self.catalog_snapshot = None
+
+    def get_games_for_criteria(self, type, properties):
+        if "kind" not in properties or "values" not in properties:
+            self.logger.warning(f"No kind/values for type {type}, ignoring")
+            return
+
+        # All values for a filter are resolved in a single query, each row
+        # reporting the value it `matched`
+        values = properties["values"]
+        if properties["kind"] == "list":
+            return self.db.iter_apps_array_filter_batch(type, values)
+        elif properties["kind"] == "value":
+            return self.db.iter_apps_value_filter_batch(type, values)
+        elif properties["kind"] == "text":
+            return self.db.iter_apps_text_filter_batch(type, values)
+        elif properties["kind"] == "similar_to":
+            return self.db.iter_apps_similar_to(
+                values, properties.get("threshold", 0.8)
+            )
+
+        self.logger.warning(f"Unknown filter kind, ignoring: {properties}")
+
+    def get_rows_for_filter(self, type, properties):
+        if not self.snapshot or "values" not in properties:
+            return self.get_games_for_criteria(type, properties)
+
+        if self.catalog_snapshot is None:
+            from db import CatalogSnapshot
+
+            self.catalog_snapshot = CatalogSnapshot(self.db, f"{self.db_path}.snapshot")
+        if not self.catalog_snapshot.supports(type, properties.get("kind")):
+            return self.get_games_for_criteria(type, properties)
+
+        matches = self.catalog_snapshot.evaluate(
+            type, properties["kind"], properties["values"]
+        )
+        return self.db.iter_apps_for_matches(matches)
+
+    def add_candidates(self, rows, games: dict, ignored_games: set) -> int:
+        # Consumes rows straight into the appid → name map of games to
+        # ignore, and the set of those already ignored
+        found = 0
+        for row in rows:
+            found += 1
+            appid = row["appid"]
+            if row["ignored"]:
+                ignored_games.add(appid)
+            elif appid not in games:
+                games[appid] = row["name"]
+        return found
+
+    def get_games_for_filters(self, filters, games: dict, ignored_games: set):
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        # Only built once a rule actually needs evaluating
+        self.catalog_snapshot = None
+        for type in filters:
+            try:
+                properties = filters[type]
+            except KeyError:
+                self.logger.warning(
+                    f"Invalid configuration: no properties for type {type}, ignoring"
+                )
+                continue
+
+            rows = self.cached_rows(
+                {"filter": type, "properties": properties},
+                partial(self.get_rows_for_filter, type, properties),
+            )
+            if rows is None:
+                continue
+            if debug:
+                rows = self.log_matches(type, rows)
+            found = self.add_candidates(rows, games, ignored_games)
+            if found > 0:
+                self.logger.info(f"Found {found} games for filter `{type}`")
+
+    def log_matches(self, type, rows):
+        for row in rows:
+            self.logger.debug(
+                f"{row['name']} / {row['appid']} matched `{type}`: {row['matched']}"
+            )
+            yield row
+
+    def get_games_for_queries(self, queries, games: dict, ignored_games: set):
+        for query in queries:
+            try:
+                description = query["description"]
+                q = query["query"]
+            except KeyError:
+                self.logger.warning(
+                    f"Invalid configuration: no description or query in {query}"
+                )
+                continue
+
+            rows = self.cached_rows(
+                {"query": q}, partial(self.db.iter_apps_for_query, q)
+            )
+            found = self.add_candidates(rows, games, ignored_games)
+            if found > 0:
+                self.logger.info(f"Found {found} games for query `{description}`")
+
+    def cached_rows(self, rule: dict, get_rows):
+        if not self.cache:
+            return get_rows()
+
+        rule_hash = hashlib.sha256(
+            json.dumps(rule, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        version = self.db.get_data_version()
+        results = self.db.get_rule_results(rule_hash, version)
+        if results is None:
+            rows = get_rows()
+            if rows is None:
+                return None
+            # Only what candidates and logging use
+            results = [
+                [
+                    row["appid"],
+                    row["name"],
+                    row["ignored"],
+                    row["matched"] if "matched" in row.keys() else None,
+                ]
+                for row in rows
+            ]
+            self.db.set_rule_results(rule_hash, version, results)
+
+        return (
+            {"appid": appid, "name": name, "ignored": ignored, "matched": matched}
+            for appid, name, ignored, matched in results
+        )
+
+    def get_candidates(self, config_path: str = "steam-games-to-ignore.yaml"):
+        # appid → name of games to ignore, and appids already ignored
+        games = {}
+        ignored_games = set()
+        with open(config_path, "r") as f:
+            y = yaml.safe_load(f)
+            map = {
+                "filters": self.get_games_for_filters,
+                "queries": self.get_games_for_queries,
+            }
+            for mode, func in map.items():
+                if mode in y:
+                    func(y[mode], games, ignored_games)
+
+        return (games, ignored_games)
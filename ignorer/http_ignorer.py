@@ -0,0 +1,124 @@
+import aiohttp
+import asyncio
+import logging
+
+from dataclasses import dataclass
+from threading import Event
+from typing import Callable
+
+from fetcher import TokenBucketRateLimiter, parse_retry_after
+
+
+@dataclass
+class HttpGameIgnorer:
+    # Calls the endpoint behind the store page's ignore button directly,
+    # reusing the cookies of a browser session that logged in to Steam.
+    cookies: list[dict]
+    limiter: TokenBucketRateLimiter
+    logger: logging.Logger
+    done_event: Event
+    # Called with (appid, name) once an app is ignored
+    on_ignored: Callable[[int, str], None] = lambda appid, name: None
+    # Called with (appid, name) once an app has been processed, ignored or not
+    on_done: Callable[[int, str], None] = lambda appid, name: None
+    concurrency: int = 4
+    timeout: float = 20
+    max_retries: int = 3
+    retry_pause: float = 5
+    store_url: str = "https://store.steampowered.com"
+
+    def __post_init__(self):
+        self.session_id = None
+        for cookie in self.cookies:
+            if cookie["name"] == "sessionid":
+                self.session_id = cookie["value"]
+        if self.session_id is None:
+            raise ValueError("No sessionid cookie, are we logged in?")
+        # Set when Steam no longer accepts our session
+        self.unauthorised = False
+
+    def run(self, games: dict[int, str]):
+        asyncio.run(self.ignore_all(games))
+
+    async def ignore_all(self, games: dict[int, str]):
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        cookies = {cookie["name"]: cookie["value"] for cookie in self.cookies}
+        async with aiohttp.ClientSession(
+            timeout=timeout, connector=connector, cookies=cookies
+        ) as session:
+            workers = [
+                asyncio.create_task(self.worker(session, queue))
+                for _ in range(self.concurrency)
+            ]
+            for appid, name in games.items():
+                if self.done_event.is_set() or self.unauthorised:
+                    break
+                await queue.put((appid, name))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+    async def worker(self, session: aiohttp.ClientSession, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            if self.done_event.is_set() or self.unauthorised:
+                continue
+            (appid, name) = item
+            if await self.ignore_game(session, appid, name):
+                self.on_ignored(appid, name)
+            self.on_done(appid, name)
+
+    async def ignore_game(
+        self, session: aiohttp.ClientSession, appid: int, name: str
+    ) -> bool:
+        url = f"{self.store_url}/recommended/ignorerecommendation/"
+        data = {"sessionid": self.session_id, "appid": str(appid)}
+        retries = 0
+        while not self.done_event.is_set():
+            await self.limiter.acquire()
+            self.logger.debug(f"Ignoring {name} / {appid}")
+            try:
+                async with session.post(url, data=data) as response:
+                    status = response.status
+                    headers = response.headers
+                    body = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.logger.info(f"Exception ignoring {name} / {appid}: {e}")
+                status = None
+
+            if status == 200:
+                if body.strip() in ("false", ""):
+                    self.logger.warning(f"Steam refused to ignore {name} / {appid}")
+                    return False
+                self.limiter.reward()
+                self.logger.debug(f"Ignored {name}")
+                return True
+
+            if status in (401, 403):
+                self.logger.error(f"Not authorised to ignore games: {headers}")
+                self.unauthorised = True
+                return False
+
+            if status == 429:
+                self.logger.warning(f"Rate limited: {headers}")
+                if self.limiter.penalise(parse_retry_after(headers.get("Retry-After"))):
+                    self.logger.info(
+                        f"Rate limit penalty applied. New sleep time: {self.limiter.sleep_time}"
+                    )
+                continue
+
+            retries += 1
+            if retries > self.max_retries:
+                self.logger.warning(f"Giving up on {name} / {appid}")
+                return False
+            if status is not None:
+                self.logger.warning(
+                    f"Unexpected server response code {status}: {headers}"
+                )
+            await asyncio.sleep(self.retry_pause * 2 ** (retries - 1))
+
+        return False
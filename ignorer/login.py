@@ -0,0 +1,16 @@
+import logging
+
+
+def login_to_steam(
+    driver, logger: logging.Logger, store_url: str = "https://store.steampowered.com"
+):
+    # Waits for the user to log in on the store page the driver opened
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    driver.get(f"{store_url}/login/")
+
+    wait = WebDriverWait(driver, 60)
+    wait.until(EC.title_is("Welcome to Steam"))
+
+    logger.debug("Logged in")
@@ -0,0 +1,74 @@
+import logging
+
+from dataclasses import dataclass
+
+from db import Database
+
+
+@dataclass
+class CompiledRules:
+    # The filters and queries of steam-games-to-ignore.yaml, evaluated one
+    # app at a time as its details land rather than over the whole catalog.
+    # list/value filters are checked in Python against the details, the
+    # other kinds and queries against the app's rows in the database.
+    config: dict
+    logger: logging.Logger
+
+    def __post_init__(self):
+        self.filters = []
+        for key, properties in (self.config.get("filters") or {}).items():
+            if not isinstance(properties, dict) or "values" not in properties:
+                self.logger.warning(f"No kind/values for type {key}, ignoring")
+                continue
+            kind = properties.get("kind")
+            if kind not in ["list", "value", "text", "similar_to"]:
+                self.logger.warning(f"Unknown filter kind, ignoring: {properties}")
+                continue
+            values = properties["values"]
+            if kind in ["list", "value"]:
+                values = set(values)
+            self.filters.append((key, kind, values, properties.get("threshold", 0.8)))
+
+        self.queries = []
+        for query in self.config.get("queries") or []:
+            if "description" not in query or "query" not in query:
+                self.logger.warning(
+                    f"Invalid configuration: no description or query in {query}"
+                )
+                continue
+            self.queries.append((query["description"], query["query"]))
+
+    def lookup(self, data: dict, key: str):
+        for part in key.split("."):
+            if not isinstance(data, dict):
+                return None
+            data = data.get(part)
+        return data
+
+    def match(self, db: Database, appid: int, details: dict) -> tuple[str, str] | None:
+        # The first (rule, matched value) the app matches, if any
+        data = details.get("data", {})
+        for key, kind, values, threshold in self.filters:
+            if kind == "list":
+                for value in self.lookup(data, key) or []:
+                    if isinstance(value, str) and value in values:
+                        return (key, value)
+            elif kind == "value":
+                value = self.lookup(data, key)
+                if isinstance(value, str) and value in values:
+                    return (key, value)
+            elif kind == "text":
+                for value in values:
+                    if db.app_matches_text(appid, key, value):
+                        return (key, value)
+            elif kind == "similar_to":
+                for value in values:
+                    score = db.get_app_similarity(appid, value)
+                    if score is not None and score >= threshold and appid != value:
+                        return (key, value)
+
+        for description, query in self.queries:
+            if db.app_matches_query(appid, query):
+                return (description, query)
+
+        return None
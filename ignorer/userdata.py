@@ -0,0 +1,18 @@
+import requests
+
+
+def fetch_ignored_appids(
+    cookies: list[dict],
+    store_url: str = "https://store.steampowered.com",
+    timeout: float = 20,
+) -> set[int]:
+    # The store's dynamic userdata lists every app the logged in account
+    # ignores, whichever way it was ignored
+    url = f"{store_url}/dynamicstore/userdata/"
+    jar = {cookie["name"]: cookie["value"] for cookie in cookies}
+    response = requests.get(url, cookies=jar, timeout=timeout)
+    response.raise_for_status()
+
+    # Either a list of appids, or a map of appid to ignore reason
+    ignored = response.json().get("rgIgnoredApps", [])
+    return {int(appid) for appid in ignored}
@@ -0,0 +1,73 @@
+import json
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from db import Database
+
+
+class StubStoreHandler(BaseHTTPRequestHandler):
+    # Answers appdetails requests with a minimal payload and counts them,
+    # after rate limiting the first `rate_limit` ones
+    def do_GET(self):
+        appid = parse_qs(urlparse(self.path).query)["appids"][0]
+        with self.server.lock:
+            self.server.requests[int(appid)] += 1
+            count = self.server.requests.total()
+        self.server.on_request(count)
+        with self.server.lock:
+            rate_limited = self.server.rate_limit > 0
+            self.server.rate_limit -= 1
+        if rate_limited:
+            self.send_response(429)
+            if self.server.retry_after is not None:
+                self.send_header("Retry-After", self.server.retry_after)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(
+            {appid: {"success": True, "data": {"type": "game", "name": f"App {appid}"}}}
+        ).encode()
+        if int(appid) in self.server.bad_json:
+            body = body[:-1]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def store():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubStoreHandler)
+    server.lock = Lock()
+    server.requests = Counter()
+    # Called with the number of requests so far, e.g. to interrupt a run
+    server.on_request = lambda count: None
+    server.rate_limit = 0
+    server.retry_after = None
+    # Appids whose response is cut short
+    server.bad_json = set()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def create_catalog(db_path: str, appids: list[int]):
+    db = Database(db_path=db_path)
+    with db.connection:
+        for appid in appids:
+            db.add_app(appid, f"App {appid}")
+    # Don't pace the stub like the real store
+    db.set_metadata("rate_limit_state", json.dumps({"sleep_time": 0.01}))
+    db.connection.close()
@@ -0,0 +1,134 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from db import Database
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGE_SIZE = 2
+
+
+class StubAppListHandler(BaseHTTPRequestHandler):
+    # IStoreService/GetAppList, paged by last_appid and filtered by
+    # if_modified_since
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        # What the dumper had saved when it asked for this page
+        self.server.seen.append(
+            (
+                params.get("if_modified_since"),
+                Database(db_path=self.server.db_path).get_metadata(
+                    "app_list_modified_since"
+                ),
+            )
+        )
+        since = int(params.get("if_modified_since", -1))
+        last_appid = int(params.get("last_appid", 0))
+        apps = [
+            app
+            for app in sorted(self.server.apps.values(), key=lambda app: app["appid"])
+            if app["last_modified"] > since and app["appid"] > last_appid
+        ]
+        page = apps[: min(int(params["max_results"]), PAGE_SIZE)]
+        response = {"apps": page, "have_more_results": len(apps) > len(page)}
+        if len(page) > 0:
+            response["last_appid"] = page[-1]["appid"]
+        body = json.dumps({"response": response}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def api(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAppListHandler)
+    server.db_path = str(tmp_path / "steam.db")
+    server.apps = {}
+    server.seen = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def refresh_list_delta(api) -> str:
+    result = subprocess.run(
+        [
+            sys.executable,
+            str(ROOT / "dump-steam-games.py"),
+            "--refresh-list",
+            "--delta-list",
+            "--api-key",
+            "key",
+            "--api-url",
+            api.url,
+            "--db",
+            api.db_path,
+        ],
+        cwd=ROOT,
+        env={**os.environ, "COLUMNS": "200"},
+        capture_output=True,
+        timeout=60,
+    )
+    output = result.stdout.decode() + result.stderr.decode()
+    assert result.returncode == 0, output
+    return output
+
+
+def test_app_list_delta(api):
+    for appid in (10, 20, 30, 40, 50):
+        api.apps[appid] = {"appid": appid, "name": f"App {appid}", "last_modified": 100}
+
+    # First sync lists everything and queues nothing
+    output = refresh_list_delta(api)
+    assert "5 new, 0 renamed, 0 queued" in output
+    assert api.seen == [(None, None)] * 3
+    db = Database(db_path=api.db_path)
+    synced_at = db.get_metadata("app_list_modified_since")
+    assert synced_at is not None
+    assert db.get_app_count() == 5
+
+    for appid in (20, 30):
+        db.upsert_app_details(
+            appid, json.dumps({"success": True, "data": {"name": f"App {appid}"}})
+        )
+    # 20 is renamed after its details were fetched, 30 is modified but its
+    # details are newer, 60 and 70 are new
+    later = int(time.time()) + 100
+    api.apps[20] = {"appid": 20, "name": "App 20 Remastered", "last_modified": later}
+    api.apps[30]["last_modified"] = later
+    with db.connection:
+        db.connection.execute(
+            "update steam_app_details set fetched_at = ? where appid = 30",
+            (later + 1,),
+        )
+    api.apps[60] = {"appid": 60, "name": "App 60", "last_modified": later}
+    api.apps[70] = {"appid": 70, "name": "App 70", "last_modified": later}
+    api.seen.clear()
+
+    output = refresh_list_delta(api)
+    assert "2 new, 1 renamed, 1 queued" in output
+    # Paged from the last sync, which only moves once the last page is in
+    assert api.seen == [(synced_at, synced_at)] * 2
+    assert db.get_metadata("app_list_modified_since") >= synced_at
+    assert db.get_app_count() == 7
+    cursor = db.connection.execute("select appid from steam_app_refetch")
+    assert [row["appid"] for row in cursor] == [20]
+    cursor = db.connection.execute("select name from steam_apps where appid = 20")
+    assert next(cursor)["name"] == "App 20 Remastered"
@@ -0,0 +1,72 @@
+import logging
+import time
+
+from threading import Event
+
+import pytest
+
+from fetcher import AsyncDetailsFetcher, TokenBucketRateLimiter
+
+APPIDS = list(range(1, 21))
+
+
+@pytest.mark.parametrize("retry_after, pause", [("1", 1), (None, 0.5)])
+def test_rate_limited_requests_are_retried(store, retry_after, pause):
+    # The first burst of requests is rate limited while all are in flight
+    store.rate_limit = 4
+    store.retry_after = retry_after
+    limiter = TokenBucketRateLimiter(
+        sleep_time=0.01, penalty=0.05, capacity=4, penalty_pause=0.5
+    )
+    details = []
+    fetched = []
+    errors = []
+    penalised = []
+    fetcher = AsyncDetailsFetcher(
+        limiter=limiter,
+        logger=logging.getLogger("test"),
+        done_event=Event(),
+        on_details=lambda key, payload: details.append(int(key)),
+        on_fetched=lambda appid, name: fetched.append(appid),
+        on_error=lambda appid, error: errors.append((appid, error)),
+        on_rate_limited=lambda: penalised.append(limiter.sleep_time),
+        concurrency=4,
+        store_url=store.url,
+    )
+
+    start = time.monotonic()
+    fetcher.run([{"appid": appid, "name": f"App {appid}"} for appid in APPIDS])
+    elapsed = time.monotonic() - start
+
+    # Penalised once for the whole burst, and paused as long as asked
+    assert penalised == [pytest.approx(0.06)]
+    assert limiter.upper_bound_sleep_time == pytest.approx(0.01)
+    assert limiter.sleep_time == pytest.approx(0.06)
+    assert len(limiter.history) == 1
+    assert elapsed >= pause
+    # Nothing is dropped
+    assert errors == []
+    assert sorted(details) == APPIDS
+    assert sorted(fetched) == APPIDS
+    assert store.requests.total() == len(APPIDS) + 4
+
+
+def test_invalid_json_is_an_error(store):
+    store.bad_json = {3}
+    limiter = TokenBucketRateLimiter(sleep_time=0.01, capacity=4)
+    fetched = []
+    errors = []
+    fetcher = AsyncDetailsFetcher(
+        limiter=limiter,
+        logger=logging.getLogger("test"),
+        done_event=Event(),
+        on_details=lambda key, payload: None,
+        on_fetched=lambda appid, name: fetched.append(appid),
+        on_error=lambda appid, error: errors.append(appid),
+        concurrency=2,
+        store_url=store.url,
+    )
+    fetcher.run([{"appid": appid, "name": f"App {appid}"} for appid in range(1, 6)])
+
+    assert errors == [3]
+    assert sorted(fetched) == [1, 2, 4, 5]
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+from pathlib import Path
+
+from conftest import create_catalog
+from db import Database
+
+ROOT = Path(__file__).resolve().parent.parent
+APPIDS = [appid * 10 for appid in range(1, 61)]
+WORKERS = 3
+
+
+def test_lease_workers_fetch_each_app_once(tmp_path, store):
+    db_path = str(tmp_path / "steam.db")
+    create_catalog(db_path, APPIDS)
+
+    workers = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                str(ROOT / "dump-steam-games.py"),
+                "--lease-worker",
+                "--db",
+                db_path,
+                "--store-url",
+                store.url,
+                "--range-size",
+                "10",
+                "--concurrency",
+                "2",
+                "--worker-id",
+                f"worker-{i}",
+            ],
+            cwd=ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        for i in range(WORKERS)
+    ]
+    for worker in workers:
+        output, _ = worker.communicate(timeout=120)
+        assert worker.returncode == 0, output.decode()
+
+    assert sorted(store.requests) == APPIDS
+    assert max(store.requests.values()) == 1
+
+    db = Database(db_path=db_path)
+    assert db.count_apps_missing_details() == 0
+    cursor = db.connection.execute(
+        "select count(*) count from fetch_leases where completed_at is null"
+    )
+    assert next(cursor)["count"] == 0
@@ -0,0 +1,59 @@
+import os
+import signal
+import subprocess
+import sys
+
+from pathlib import Path
+
+from conftest import create_catalog
+from db import Database
+
+ROOT = Path(__file__).resolve().parent.parent
+APPIDS = [appid * 10 for appid in range(1, 31)]
+
+
+def fetch_missing_details(db_path: str, store_url: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "dump-steam-games.py"),
+            "--fetch-missing-details",
+            "--db",
+            db_path,
+            "--store-url",
+            store_url,
+        ],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def test_fetch_missing_details_resumes_from_checkpoint(tmp_path, store):
+    db_path = str(tmp_path / "steam.db")
+    create_catalog(db_path, APPIDS)
+
+    dumper = fetch_missing_details(db_path, store.url)
+
+    def interrupt(count: int):
+        if count == 10:
+            os.kill(dumper.pid, signal.SIGINT)
+
+    store.on_request = interrupt
+    output, _ = dumper.communicate(timeout=60)
+    assert dumper.returncode == 0, output.decode()
+    assert sorted(store.requests) == APPIDS[:10]
+    # Every app before the next one in line was processed
+    position = int(Database(db_path=db_path).get_metadata("fetch_position"))
+    assert APPIDS[9] <= position < APPIDS[10]
+
+    store.on_request = lambda count: None
+    dumper = fetch_missing_details(db_path, store.url)
+    output, _ = dumper.communicate(timeout=60)
+    assert dumper.returncode == 0, output.decode()
+    assert sorted(store.requests) == APPIDS
+    assert max(store.requests.values()) == 1
+
+    db = Database(db_path=db_path)
+    assert db.count_apps_missing_details() == 0
+    assert db.get_metadata("fetch_position") == "-1"
@@ -0,0 +1,15 @@
+import asyncio
+
+from fetcher import TokenBucketRateLimiter
+
+
+async def contend(limiter: TokenBucketRateLimiter, workers: int):
+    await asyncio.gather(*(limiter.acquire() for _ in range(workers)))
+
+
+def test_limiter_is_reusable_across_event_loops():
+    # Lease ranges and watch mode ignore batches each run their own loop
+    limiter = TokenBucketRateLimiter(sleep_time=0.001)
+    for _ in range(3):
+        asyncio.run(contend(limiter, 4))
+
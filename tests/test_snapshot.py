@@ -0,0 +1,36 @@
+import json
+
+from db import CatalogSnapshot, Database
+
+
+def details(appid: int, developer: str) -> str:
+    return json.dumps(
+        {"success": True, "data": {"name": f"App {appid}", "developers": [developer]}}
+    )
+
+
+def test_snapshot_ignores_details_written_during_build(tmp_path):
+    db_path = str(tmp_path / "steam.db")
+    db = Database(db_path=db_path)
+    for appid in range(20, 26):
+        db.upsert_app_details(appid, details(appid, f"Developer {appid}"))
+
+    # Another process fetches app 26 between the snapshot's scans
+    iter_app_values = db.iter_app_values
+
+    def iter_app_values_then_write():
+        yield from iter_app_values()
+        Database(db_path=db_path).upsert_app_details(26, details(26, "Aztech"))
+
+    db.iter_app_values = iter_app_values_then_write
+
+    snapshot = CatalogSnapshot(db, str(tmp_path / "steam.db.snapshot"))
+    assert snapshot.evaluate("developers", "list", ["Aztech"]) == []
+    assert snapshot.evaluate("developers", "list", ["Developer 25"]) == [
+        (25, "Developer 25")
+    ]
+
+    # The new app makes the next run rebuild it
+    db.iter_app_values = iter_app_values
+    snapshot = CatalogSnapshot(db, str(tmp_path / "steam.db.snapshot"))
+    assert snapshot.evaluate("developers", "list", ["Aztech"]) == [(26, "Aztech")]
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from db import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(db_path=str(tmp_path / "steam.db"))
+    names = ["Half-Life 3", "Hentai Simulator 2024", "C++ Tycoon", "Don't Starve"]
+    for appid, name in enumerate(names, start=1):
+        db.upsert_app_details(
+            appid, json.dumps({"success": True, "data": {"name": name}})
+        )
+    return db
+
+
+@pytest.mark.parametrize(
+    "value, appid",
+    [
+        ("hentai", 2),
+        ('"simulator 2024"', 2),
+        ("Half-Life", 1),
+        ("C++", 3),
+        ("don't", 4),
+        ("(hentai", 2),
+    ],
+)
+def test_text_filter_values(db, value, appid):
+    rows = db.list_apps_text_filter_batch("name", [value])
+    assert [row["appid"] for row in rows] == [appid]
+    assert db.app_matches_text(appid, "name", value)
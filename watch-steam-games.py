@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import os
+import signal
+import time
+import yaml
+
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+
+from rich.logging import RichHandler
+
+from db import Database, DatabaseWriter
+from db.projection import DEFAULT_PROJECTION
+from fetcher import AppListRefresher, TokenBucketRateLimiter
+from ignorer import CompiledRules
+
+
+class SteamWatcher:
+    # Streams apps through discovery → details fetch → rule evaluation →
+    # ignore. Each stage is a thread, connected to the next by a bounded
+    # queue, so a stage that falls behind holds back the ones before it.
+    def __init__(
+        self,
+        logger,
+        done_event: Event,
+        db_path: str = "data/steam.db",
+        projection: list[str] | None = None,
+        keep_raw: bool = False,
+    ):
+        self.logger = logger
+        self.done_event = done_event
+        self.db_path = db_path
+        self.db = Database(db_path=db_path, projection=projection, keep_raw=keep_raw)
+        # The database may default to the storage mode it was converted to
+        self.projection = self.db.projection
+        self.keep_raw = self.db.keep_raw
+
+        # Apps between discovery and evaluation, so they are only fetched once
+        self.pending = set()
+        self.pending_lock = Lock()
+
+    def run(
+        self,
+        config_path: str,
+        dry_run: bool,
+        concurrency: int,
+        store_url: str,
+        api_url: str,
+        api_key: str | None,
+        list_interval: float,
+        poll_interval: float,
+        budget: int,
+        queue_size: int,
+    ):
+        with open(config_path, "r") as f:
+            rules = CompiledRules(yaml.safe_load(f), self.logger)
+
+        cookies = None
+        if not dry_run:
+            cookies = self.login(store_url)
+
+        # Resume at the rate learned by previous runs of either script
+        limiter = TokenBucketRateLimiter()
+        state = self.db.get_metadata("rate_limit_state")
+        if state is not None:
+            limiter.restore(json.loads(state))
+
+        self.fetch_queue = Queue(maxsize=queue_size)
+        self.evaluate_queue = Queue(maxsize=queue_size)
+        self.ignore_queue = Queue(maxsize=queue_size)
+        self.writer = DatabaseWriter(self.logger, db_path=self.db_path)
+
+        stages = [
+            (self.discover, (api_url, api_key, list_interval, poll_interval, budget)),
+            (self.fetch, (limiter, concurrency, store_url)),
+            (self.evaluate, (rules,)),
+            (self.ignore, (cookies, store_url)),
+        ]
+        threads = [
+            Thread(target=self.run_stage, args=stage, name=stage[0].__name__)
+            for stage in stages
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            # Joined with a timeout so SIGINT is still handled
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1)
+        finally:
+            self.writer.close()
+
+    def run_stage(self, stage, args):
+        # Stages can't carry on without each other
+        try:
+            stage(*args)
+        except Exception:
+            self.logger.exception(f"Stage {stage.__name__} failed, stopping")
+        finally:
+            self.done_event.set()
+
+    def put(self, queue: Queue, item) -> bool:
+        # Blocks while the next stage is behind
+        while not self.done_event.is_set():
+            try:
+                queue.put(item, timeout=1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def drain(self, queue: Queue):
+        while not self.done_event.is_set():
+            try:
+                yield queue.get(timeout=1)
+            except Empty:
+                continue
+
+    def claim(self, appid: int) -> bool:
+        with self.pending_lock:
+            if appid in self.pending:
+                return False
+            self.pending.add(appid)
+            return True
+
+    def release(self, appid: int):
+        with self.pending_lock:
+            self.pending.discard(appid)
+
+    def login(self, store_url: str) -> list[dict]:
+        from selenium import webdriver
+
+        from ignorer import fetch_ignored_appids, login_to_steam
+
+        driver = webdriver.Chrome()
+        try:
+            login_to_steam(driver, self.logger, store_url)
+            cookies = driver.get_cookies()
+        finally:
+            driver.quit()
+
+        ignored = fetch_ignored_appids(cookies, store_url)
+        self.db.upsert_games_ignored(ignored)
+        self.logger.info(f"Synced {len(ignored)} games already ignored by the account")
+
+        return cookies
+
+    def discover(
+        self,
+        api_url: str,
+        api_key: str | None,
+        list_interval: float,
+        poll_interval: float,
+        budget: int,
+    ):
+        # With its own connection in this thread
+        db = Database(db_path=self.db_path)
+        app_list = AppListRefresher(db, self.logger, self.done_event)
+
+        next_refresh = 0
+        while not self.done_event.is_set():
+            if time.monotonic() >= next_refresh:
+                try:
+                    if api_key is not None:
+                        app_list.refresh_delta(api_url, api_key)
+                    else:
+                        app_list.refresh_streaming()
+                except Exception as e:
+                    self.logger.warning(f"App list refresh failed: {e}")
+                next_refresh = time.monotonic() + list_interval
+
+            for app in db.list_apps_awaiting_details(budget):
+                if self.claim(app["appid"]) and not self.put(self.fetch_queue, app):
+                    return
+
+            self.done_event.wait(poll_interval)
+
+    def fetch(self, limiter: TokenBucketRateLimiter, concurrency: int, store_url: str):
+        from fetcher import AsyncDetailsFetcher
+
+        def on_error(appid: int, error: str):
+            self.writer.record_fetch_error(appid, error)
+            self.release(appid)
+
+        fetcher = AsyncDetailsFetcher(
+            limiter=limiter,
+            logger=self.logger,
+            done_event=self.done_event,
+            on_details=lambda key, details: self.put(
+                self.evaluate_queue, ("details", int(key), details)
+            ),
+            on_fetched=lambda appid, name: self.put(
+                self.evaluate_queue, ("fetched", appid, name)
+            ),
+            on_error=on_error,
+            on_rate_limited=lambda: self.writer.set_metadata(
+                "rate_limit_state", json.dumps(limiter.state())
+            ),
+            concurrency=concurrency,
+            store_url=store_url,
+            blocking_source=True,
+            # Waiting on a full evaluate queue must not stall the event loop,
+            # in-flight requests would time out and be recorded as errors
+            blocking_sink=True,
+        )
+        fetcher.run(self.drain(self.fetch_queue))
+        self.writer.set_metadata("rate_limit_state", json.dumps(limiter.state()))
+
+    def evaluate(self, rules: CompiledRules):
+        # Details are committed here before the rules look at them, as some
+        # rules run against the database
+        db = Database(
+            db_path=self.db_path, projection=self.projection, keep_raw=self.keep_raw
+        )
+        for item in self.drain(self.evaluate_queue):
+            if item[0] == "fetched":
+                self.release(item[1])
+                continue
+
+            (_, appid, details) = item
+            db.upsert_app_details(appid, details)
+            details = json.loads(details)
+            if not details.get("success") or db.is_game_ignored(appid):
+                continue
+
+            match = rules.match(db, appid, details)
+            if match is None:
+                continue
+            name = details["data"].get("name", str(appid))
+            self.logger.info(f"{name} / {appid} matched `{match[0]}`: {match[1]}")
+            if not self.put(self.ignore_queue, (appid, name)):
+                return
+
+    def ignore(self, cookies: list[dict] | None, store_url: str):
+        from ignorer import HttpGameIgnorer
+
+        # Same pace as ignore-steam-games.py's --http-ignore. Each batch runs
+        # its own event loop, the limiter keeps the learned pace across them.
+        limiter = TokenBucketRateLimiter(sleep_time=0.5, penalty=0.5, grace=0.05)
+        for appid, name in self.drain(self.ignore_queue):
+            # Whatever else is already waiting goes in the same batch
+            games = {appid: name}
+            while True:
+                try:
+                    (appid, name) = self.ignore_queue.get_nowait()
+                except Empty:
+                    break
+                games[appid] = name
+
+            if cookies is None:
+                for appid, name in games.items():
+                    self.logger.info(f"Would ignore {name} / {appid}")
+                continue
+
+            ignorer = HttpGameIgnorer(
+                cookies=cookies,
+                limiter=limiter,
+                logger=self.logger,
+                done_event=self.done_event,
+                on_ignored=lambda appid, name: self.writer.upsert_game_ignored(appid),
+                store_url=store_url,
+            )
+            ignorer.run(games)
+            if ignorer.unauthorised:
+                self.logger.error("Steam no longer accepts the session, stopping")
+                return
+
+
+def handle_sigint(signum, frame):
+    done_event.set()
+
+
+if __name__ == "__main__":
+    done_event = Event()
+    signal.signal(signal.SIGINT, handle_sigint)
+
+    parser = argparse.ArgumentParser(
+        description="Continuously fetches new Steam games and ignores those matching criteria"
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        help="Whether to actually ignore games or just log those that would be",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=True,
+    )
+
+    parser.add_argument(
+        "--config",
+        help="Ruleset of games to ignore",
+        type=str,
+        default="steam-games-to-ignore.yaml",
+    )
+
+    parser.add_argument(
+        "--db",
+        help="Path of the database",
+        type=str,
+        default="data/steam.db",
+    )
+
+    parser.add_argument(
+        "--api-key",
+        help="Steam Web API key, to only list apps modified since the last sync instead of the full list. Defaults to $STEAM_API_KEY",
+        type=str,
+        default=os.environ.get("STEAM_API_KEY"),
+    )
+
+    parser.add_argument(
+        "--api-url",
+        help="Base URL of the Steam Web API",
+        type=str,
+        default="https://api.steampowered.com",
+    )
+
+    parser.add_argument(
+        "--list-interval",
+        help="Seconds between app list refreshes",
+        type=float,
+        default=3600,
+    )
+
+    parser.add_argument(
+        "--poll-interval",
+        help="Seconds between checks for apps awaiting details",
+        type=float,
+        default=60,
+    )
+
+    parser.add_argument(
+        "--budget",
+        help="Maximum number of apps queued for fetching per check",
+        type=int,
+        default=1000,
+    )
+
+    parser.add_argument(
+        "--queue-size",
+        help="Capacity of the queues between stages",
+        type=int,
+        default=100,
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        help="Maximum number of in-flight details requests",
+        type=int,
+        default=4,
+    )
+
+    parser.add_argument(
+        "--store-url",
+        help="Base URL of the Steam store",
+        type=str,
+        default="https://store.steampowered.com",
+    )
+
+    parser.add_argument(
+        "--lean",
+        help="Whether to store only a projection of the details fields",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--projection",
+        help="Comma separated details fields to keep with --lean",
+        type=str,
+        default=",".join(DEFAULT_PROJECTION),
+    )
+
+    parser.add_argument(
+        "--keep-raw",
+        help="Whether to also keep the full compressed details with --lean",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    parser.add_argument(
+        "--debug",
+        help="Verbose/debug mode",
+        type=bool,
+        action=argparse.BooleanOptionalAction,
+        default=False,
+    )
+
+    args = parser.parse_args()
+
+    verbosity = "INFO"
+    console_fmt = "%(message)s"
+    show_level = show_path = show_time = False
+    if args.debug:
+        verbosity = "DEBUG"
+        show_level = show_path = show_time = True
+    handler = RichHandler(
+        level=verbosity,
+        show_time=show_time,
+        show_level=show_level,
+        show_path=show_path,
+        markup=True,
+    )
+    handler.setFormatter(logging.Formatter(console_fmt))
+    logging.basicConfig(level=verbosity, handlers=[handler])
+    logger = logging.getLogger("steam-watcher")
+
+    projection = args.projection.split(",") if args.lean else None
+    watcher = SteamWatcher(
+        logger,
+        done_event,
+        db_path=args.db,
+        projection=projection,
+        keep_raw=args.keep_raw,
+    )
+    watcher.run(
+        args.config,
+        args.dry_run,
+        args.concurrency,
+        args.store_url,
+        args.api_url,
+        args.api_key,
+        args.list_interval,
+        args.poll_interval,
+        args.budget,
+        args.queue_size,
+    )